@@ -0,0 +1,118 @@
+"""Micro-benchmark for title scoring.
+
+Compares the original per-call _precise_match_score (re-tokenizing and
+re-running the digit regex for every title) with PreparedQuery/PreparedTitle
+and with the batched _score_titles, over the Altex catalog dump.
+
+Run: python bench_scoring.py [n_queries]
+"""
+import json
+import os
+import random
+import re
+import sys
+import time
+
+from rapidfuzz import fuzz
+
+from scrapers.utils import (
+    PreparedQuery,
+    _precise_match_score,
+    _prepare_title,
+    _score_titles,
+)
+
+DUMP = os.path.join(os.path.dirname(__file__), "standalone", "altex_crawler", "altex_all_categories.json")
+
+
+# --- original implementation, kept verbatim for comparison ---
+def _legacy_match_score(title: str, query: str) -> float:
+    t = (title or "").lower()
+    q = (query or "").lower()
+    return max(fuzz.token_set_ratio(q, t), fuzz.partial_ratio(q, t))
+
+
+def _legacy_tokenize_words(s: str) -> list:
+    tokens = re.split(r"[^\w]+", (s or "").lower())
+    stop = {"si", "sau", "de", "la", "cu", "in", "pe", "pentru", "the", "and", "with"}
+    return [t for t in tokens if t and t not in stop]
+
+
+def _legacy_token_coverage(title: str, query: str) -> float:
+    tset = set(_legacy_tokenize_words(title))
+    qtok = [w for w in _legacy_tokenize_words(query)]
+    if not qtok:
+        return 0.0
+    return sum(1 for w in qtok if w in tset) / len(qtok)
+
+
+def _legacy_numeric_mismatch_penalty(title: str, query: str) -> int:
+    q_nums = set(re.findall(r"\d+", query or ""))
+    t_nums = set(re.findall(r"\d+", title or ""))
+    penalty = 0
+    if q_nums and not q_nums.issubset(t_nums):
+        penalty += 25
+    extra = t_nums - q_nums
+    if extra:
+        if {n for n in extra if len(n) <= 2}:
+            penalty += 15
+        if {n for n in extra if len(n) == 4}:
+            penalty += 5
+    return penalty
+
+
+def _legacy_precise_match_score(title: str, query: str) -> float:
+    base = _legacy_match_score(title, query)
+    cov = _legacy_token_coverage(title, query)
+    pen = _legacy_numeric_mismatch_penalty(title, query)
+    return base * (0.5 + 0.5 * cov) - pen
+
+
+def _timed(label: str, fn) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed * 1000:9.1f} ms")
+    return elapsed
+
+
+def main():
+    n_queries = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    with open(DUMP, "r", encoding="utf-8") as f:
+        titles = [r["title"] for r in json.load(f) if r.get("title")]
+    random.seed(0)
+    queries = [" ".join(random.choice(titles).split()[:5]) for _ in range(n_queries)]
+    print(f"{len(titles)} titles x {len(queries)} queries\n")
+
+    def legacy():
+        for q in queries:
+            for t in titles:
+                _legacy_precise_match_score(t, q)
+
+    def prepared():
+        for q in queries:
+            pq = PreparedQuery(q)
+            for t in titles:
+                _precise_match_score(_prepare_title(t), pq)
+
+    def batched():
+        for q in queries:
+            _score_titles(titles, q, precise=True)
+
+    base = _timed("legacy per-call", legacy)
+    _prepare_title.cache_clear()
+    _timed("prepared (cold title cache)", prepared)
+    warm = _timed("prepared (warm title cache)", prepared)
+    batch = _timed("batched cdist", batched)
+    print(f"\nspeed-up: prepared x{base / warm:.1f}, batched x{base / batch:.1f}")
+
+    # sanity check: all paths agree
+    q = queries[0]
+    scores = _score_titles(titles[:500], q, precise=True)
+    for t, s in zip(titles[:500], scores):
+        assert abs(_legacy_precise_match_score(t, q) - s) < 1e-6
+        assert abs(_precise_match_score(t, q) - s) < 1e-6
+
+
+if __name__ == "__main__":
+    main()
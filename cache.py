@@ -1,11 +1,112 @@
 import json
+import logging
 import os
+import re
+import sqlite3
+import threading
 import time
-from typing import Any, Dict, Optional
+from contextlib import contextmanager
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
 
 
 CACHE_DIR = os.path.join(os.path.dirname(__file__), "data")
+CACHE_DB = os.path.join(CACHE_DIR, "cache.sqlite3")
+# Legacy whole-file JSON cache; imported once into CACHE_DB and then left untouched.
 CACHE_FILE = os.path.join(CACHE_DIR, "cache.json")
+# Advisory lock serializing writers (and the one-shot migration) across processes.
+CACHE_LOCK = os.path.join(CACHE_DIR, "cache.lock")
+
+_log = logging.getLogger(__name__)
+
+# find_best scores at most this many titles, picked by shared trigrams with the query.
+FIND_BEST_CANDIDATES = 200
+_WORD_RE = re.compile(r"\w+")
+
+# Price freshness, in seconds since an item was last saved. Within the TTL a
+# hit is served as-is; past it, it is served but flagged stale (callers refresh
+# it in the background); past the max age it is not served at all.
+CACHE_TTL: Dict[str, float] = {"emag": 2 * 3600, "altex": 6 * 3600, "pcgarage": 6 * 3600}
+DEFAULT_TTL = 6 * 3600
+CACHE_MAX_AGE: Dict[str, float] = {}
+DEFAULT_MAX_AGE = 3 * 24 * 3600
+
+# Queries that found nothing are remembered per site for a short while, by reason.
+NEG_TIMEOUT = "timeout"
+NEG_NO_CARDS = "no_cards"
+NEG_BELOW_THRESHOLD = "below_threshold"
+NEG_CAPTCHA = "captcha"
+NEGATIVE_TTL: Dict[str, float] = {
+    NEG_TIMEOUT: 5 * 60,
+    NEG_CAPTCHA: 10 * 60,
+    NEG_NO_CARDS: 30 * 60,
+    NEG_BELOW_THRESHOLD: 30 * 60,
+}
+_GRAM_SEP = "|"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    site TEXT NOT NULL,
+    url TEXT NOT NULL,
+    title_key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    saved_at REAL,
+    grams TEXT,
+    PRIMARY KEY (site, url)
+);
+CREATE INDEX IF NOT EXISTS items_site_title ON items (site, title_key);
+CREATE TABLE IF NOT EXISTS query_index (
+    site TEXT NOT NULL,
+    query TEXT NOT NULL,
+    url TEXT NOT NULL,
+    PRIMARY KEY (site, query)
+);
+CREATE INDEX IF NOT EXISTS query_index_site_url ON query_index (site, url);
+CREATE TABLE IF NOT EXISTS negative_queries (
+    site TEXT NOT NULL,
+    query TEXT NOT NULL,
+    reason TEXT NOT NULL,
+    saved_at REAL NOT NULL,
+    PRIMARY KEY (site, query)
+);
+CREATE TABLE IF NOT EXISTS crawls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    site TEXT NOT NULL,
+    source TEXT,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    last_row INTEGER,
+    seen INTEGER NOT NULL DEFAULT 0,
+    changed INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS price_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    site TEXT NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT,
+    price REAL NOT NULL,
+    crawl_id INTEGER,
+    seen_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS price_history_site_url ON price_history (site, url, id);
+CREATE INDEX IF NOT EXISTS price_history_site_id ON price_history (site, id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# sqlite3 connections may not be shared between threads; keep one per thread.
+_local = threading.local()
 
 
 def _now_ts() -> float:
@@ -19,7 +120,101 @@ def _ensure_cache_dir():
         pass
 
 
-def _load_raw() -> Dict[str, Any]:
+def _title_key(title: Optional[str]) -> str:
+    return (title or "").strip().lower()
+
+
+def _title_grams(title: Optional[str]) -> Set[str]:
+    """Trigrams of each word padded with spaces, so short words and word
+    boundaries get their own grams (" i3", "i3 ")."""
+    grams: Set[str] = set()
+    for tok in _WORD_RE.findall((title or "").lower()):
+        padded = f" {tok} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i : i + 3])
+    return grams
+
+
+@contextmanager
+def _file_lock():
+    _ensure_cache_dir()
+    with open(CACHE_LOCK, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def _transaction(conn: sqlite3.Connection):
+    """Write transaction taken under the advisory lock.
+
+    BEGIN IMMEDIATE grabs SQLite's write lock up front, so a read-modify-write
+    inside the block cannot interleave with another process's commit.
+    """
+    with _file_lock():
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+def _open_db() -> sqlite3.Connection:
+    # autocommit mode: transactions are opened explicitly by _transaction
+    conn = sqlite3.connect(CACHE_DB, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    _migrate_grams(conn)
+    _migrate_legacy(conn)
+    return conn
+
+
+def _quarantine_db() -> None:
+    """Move an unreadable database aside so the next connect starts clean."""
+    stamp = int(_now_ts())
+    with _file_lock():
+        for suffix in ("", "-wal", "-shm"):
+            path = CACHE_DB + suffix
+            if os.path.exists(path):
+                try:
+                    os.replace(path, f"{path}.corrupt-{stamp}")
+                except OSError:
+                    pass
+    _log.warning("cache database was corrupt; moved aside as %s.corrupt-%d", CACHE_DB, stamp)
+
+
+def _connect() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is not None and getattr(_local, "path", None) == CACHE_DB:
+        return conn
+    _ensure_cache_dir()
+    try:
+        conn = _open_db()
+    except sqlite3.DatabaseError as e:
+        if isinstance(e, sqlite3.OperationalError):
+            raise
+        # "file is not a database" / "database disk image is malformed"
+        _quarantine_db()
+        conn = _open_db()
+    _local.conn = conn
+    _local.path = CACHE_DB
+    return conn
+
+
+def _load_legacy_json() -> Dict[str, Any]:
     try:
         if not os.path.exists(CACHE_FILE):
             return {}
@@ -32,75 +227,491 @@ def _load_raw() -> Dict[str, Any]:
     return {}
 
 
-def load_cache() -> Dict[str, list]:
-    """Load items per site. Backward compatible.
+def _migrate_legacy(conn: sqlite3.Connection) -> None:
+    """One-shot import of data/cache.json into the SQLite store.
 
-    New schema: { "items": {site: [..]}, "query_index": {site: {normalized_query: url}} }
-    Old schema (backward): { site: [..] }
+    Legacy schemas: { "items": {site: [..]}, "query_index": {site: {normalized_query: url}} }
+    or the older { site: [..] }.
     """
-    raw = _load_raw()
+    if conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_migrated'").fetchone():
+        return
+    raw = _load_legacy_json()
     if "items" in raw and isinstance(raw["items"], dict):
         items = raw["items"]
-        return {k: (v if isinstance(v, list) else []) for k, v in items.items()}
-    # old shape
-    return {k: (v if isinstance(v, list) else []) for k, v in raw.items()}
+    else:
+        items = {k: v for k, v in raw.items() if k != "query_index"}
+    qidx = raw.get("query_index") if isinstance(raw.get("query_index"), dict) else {}
+    with _transaction(conn):
+        # another process may have migrated while we waited for the lock
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_migrated'").fetchone():
+            return
+        for site, entries in items.items():
+            if not isinstance(entries, list):
+                continue
+            for it in entries:
+                if isinstance(it, dict):
+                    _write_item(conn, site, it)
+        for site, site_map in qidx.items():
+            if not isinstance(site_map, dict):
+                continue
+            for q, url in site_map.items():
+                if url:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO query_index (site, query, url) VALUES (?, ?, ?)",
+                        (site, q, url),
+                    )
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_migrated', ?)",
+            (str(_now_ts()),),
+        )
+
+
+def _migrate_grams(conn: sqlite3.Connection) -> None:
+    """Add and backfill the per-item trigram column on databases created before it."""
+    cols = {row[1] for row in conn.execute("PRAGMA table_info(items)")}
+    if "grams" in cols and not conn.execute("SELECT 1 FROM items WHERE grams IS NULL LIMIT 1").fetchone():
+        return
+    with _transaction(conn):
+        if "grams" not in {row[1] for row in conn.execute("PRAGMA table_info(items)")}:
+            conn.execute("ALTER TABLE items ADD COLUMN grams TEXT")
+        rows = conn.execute("SELECT site, url, data FROM items WHERE grams IS NULL").fetchall()
+        for site, url, data in rows:
+            title = json.loads(data).get("title")
+            conn.execute(
+                "UPDATE items SET grams = ? WHERE site = ? AND url = ?",
+                (_GRAM_SEP.join(sorted(_title_grams(title))), site, url),
+            )
+
+
+def _read_item(conn: sqlite3.Connection, site: str, url: str) -> Optional[Dict[str, Any]]:
+    row = conn.execute("SELECT data FROM items WHERE site = ? AND url = ?", (site, url)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def _write_item(conn: sqlite3.Connection, site: str, item: Dict[str, Any]) -> None:
+    conn.execute(
+        "INSERT OR REPLACE INTO items (site, url, title_key, data, saved_at, grams) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            site,
+            (item.get("url") or "").strip(),
+            _title_key(item.get("title")),
+            json.dumps(item, ensure_ascii=False, separators=(",", ":")),
+            item.get("saved_at"),
+            _GRAM_SEP.join(sorted(_title_grams(item.get("title")))),
+        ),
+    )
+
+
+def _history_price(price: Any) -> Optional[float]:
+    return round(float(price), 2) if isinstance(price, (int, float)) and price > 0 else None
+
+
+def _record_price(
+    conn: sqlite3.Connection, site: str, item: Dict[str, Any], crawl_id: Optional[int], seen_at: float
+) -> bool:
+    """Append a price_history row if the item's price or title differs from its last row."""
+    url = (item.get("url") or "").strip()
+    price = _history_price(item.get("price"))
+    if not url or price is None:
+        return False
+    last = conn.execute(
+        "SELECT title, price FROM price_history WHERE site = ? AND url = ? ORDER BY id DESC LIMIT 1",
+        (site, url),
+    ).fetchone()
+    title = (item.get("title") or "").strip() or (last[0] if last else None)
+    if last is not None and last[0] == title and last[1] == price:
+        return False
+    conn.execute(
+        "INSERT INTO price_history (site, url, title, price, crawl_id, seen_at) VALUES (?, ?, ?, ?, ?, ?)",
+        (site, url, title, price, crawl_id, seen_at),
+    )
+    return True
+
+
+def _db_signature() -> Tuple[Optional[Tuple[int, int]], ...]:
+    """(mtime, size) of the database and its WAL; changes whenever anyone commits."""
+    sig = []
+    for path in (CACHE_DB, CACHE_DB + "-wal"):
+        try:
+            st = os.stat(path)
+            sig.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            sig.append(None)
+    return tuple(sig)
+
+
+class _CacheStore:
+    """Process-level, memoized view of the cache database.
+
+    Items are held per site keyed by URL, with a second dict from lower-cased
+    title to URL, so lookups and upserts never scan. The snapshot is reloaded
+    only when the database files change on disk. Writes are applied in memory
+    and flushed in one transaction per call, or once per `batch()` block.
+
+    find_best narrows its search through an inverted trigram index per site,
+    built lazily from the grams persisted with each item and kept up to date
+    by upserts.
+
+    Pending writes are kept as per-item patches and re-applied onto the rows
+    read inside the write transaction, so concurrent workers sharing the
+    database merge their updates instead of overwriting each other.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._sig: Optional[Tuple[Any, ...]] = None
+        self._path: Optional[str] = None
+        self._items: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._titles: Dict[str, Dict[str, str]] = {}
+        self._queries: Dict[str, Dict[str, str]] = {}
+        self._item_grams: Dict[str, Dict[str, str]] = {}
+        self._gram_index: Dict[str, Dict[str, Set[str]]] = {}
+        # (site, url) -> (url the item was matched under, if different; fields to apply)
+        self._pending: Dict[Tuple[str, str], Tuple[Optional[str], Dict[str, Any]]] = {}
+        self._dirty_queries: Dict[Tuple[str, str], str] = {}
+        # site -> normalized query -> (reason, saved_at); None in the dirty map deletes
+        self._negative: Dict[str, Dict[str, Tuple[str, float]]] = {}
+        self._dirty_negative: Dict[Tuple[str, str], Optional[Tuple[str, float]]] = {}
+        self._replace_all = False
+        self._depth = 0
+
+    # --- loading ---
+    def _refresh(self) -> None:
+        if self._depth or self._has_pending():
+            return
+        if self._path == CACHE_DB and self._sig is not None and self._sig == _db_signature():
+            return
+        conn = _connect()
+        sig = _db_signature()
+        items: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        titles: Dict[str, Dict[str, str]] = {}
+        queries: Dict[str, Dict[str, str]] = {}
+        item_grams: Dict[str, Dict[str, str]] = {}
+        for site, url, title_key, data, grams in conn.execute(
+            "SELECT site, url, title_key, data, grams FROM items ORDER BY rowid"
+        ):
+            items.setdefault(site, {})[url] = json.loads(data)
+            titles.setdefault(site, {}).setdefault(title_key, url)
+            item_grams.setdefault(site, {})[url] = grams or ""
+        for site, q, url in conn.execute("SELECT site, query, url FROM query_index"):
+            queries.setdefault(site, {})[q] = url
+        negative: Dict[str, Dict[str, Tuple[str, float]]] = {}
+        for site, q, reason, saved_at in conn.execute(
+            "SELECT site, query, reason, saved_at FROM negative_queries"
+        ):
+            negative.setdefault(site, {})[q] = (reason, saved_at)
+        self._items, self._titles, self._queries = items, titles, queries
+        self._negative = negative
+        self._item_grams, self._gram_index = item_grams, {}
+        self._sig = sig
+        self._path = CACHE_DB
+
+    def _has_pending(self) -> bool:
+        return bool(self._pending or self._dirty_queries or self._dirty_negative or self._replace_all)
+
+    # --- writing ---
+    @contextmanager
+    def batch(self):
+        with self._lock:
+            self._refresh()
+            self._depth += 1
+            try:
+                yield self
+            finally:
+                self._depth -= 1
+                if not self._depth:
+                    self._flush()
+
+    def _flush(self) -> None:
+        if not self._has_pending():
+            return
+        try:
+            conn = _connect()
+            with _transaction(conn):
+                before = _db_signature()
+                if self._replace_all:
+                    conn.execute("DELETE FROM items")
+                    for site, by_url in self._items.items():
+                        for it in by_url.values():
+                            _write_item(conn, site, it)
+                for (site, url), (origin, patch) in self._pending.items():
+                    self._merge_item(conn, site, url, origin, patch)
+                for (site, q), url in self._dirty_queries.items():
+                    conn.execute(
+                        "INSERT OR REPLACE INTO query_index (site, query, url) VALUES (?, ?, ?)",
+                        (site, q, url),
+                    )
+                for (site, q), neg in self._dirty_negative.items():
+                    if neg is None:
+                        conn.execute("DELETE FROM negative_queries WHERE site = ? AND query = ?", (site, q))
+                    else:
+                        conn.execute(
+                            "INSERT OR REPLACE INTO negative_queries (site, query, reason, saved_at) "
+                            "VALUES (?, ?, ?, ?)",
+                            (site, q, neg[0], neg[1]),
+                        )
+            # if someone else committed since our snapshot, reload on next read
+            self._sig = _db_signature() if before == self._sig else None
+        except sqlite3.Error:
+            self._sig = None
+            raise
+        finally:
+            self._pending.clear()
+            self._dirty_queries.clear()
+            self._dirty_negative.clear()
+            self._replace_all = False
+
+    def _merge_item(
+        self, conn: sqlite3.Connection, site: str, url: str, origin: Optional[str], patch: Dict[str, Any]
+    ) -> None:
+        item = _read_item(conn, site, url)
+        if item is None and origin:
+            item = _read_item(conn, site, origin)
+        item = item or {}
+        item.update(patch)
+        item["saved_at"] = _now_ts()
+        if origin and origin != url:
+            conn.execute("DELETE FROM items WHERE site = ? AND url = ?", (site, origin))
+            conn.execute(
+                "UPDATE query_index SET url = ? WHERE site = ? AND url = ?",
+                (url, site, origin),
+            )
+        _write_item(conn, site, item)
+        _record_price(conn, site, item, None, item["saved_at"])
+        mem = self._items.get(site, {}).get(url)
+        if mem is not None:
+            mem.update(item)
+
+    def _index_title(self, site: str, title_key: str, url: str) -> None:
+        self._titles.setdefault(site, {}).setdefault(title_key, url)
+
+    def _unindex_title(self, site: str, title_key: str, url: str) -> None:
+        titles = self._titles.get(site, {})
+        if titles.get(title_key) == url:
+            del titles[title_key]
+
+    def _unindex_grams(self, site: str, url: str) -> None:
+        grams = self._item_grams.get(site, {}).pop(url, None)
+        index = self._gram_index.get(site)
+        if grams and index is not None:
+            for g in grams.split(_GRAM_SEP):
+                urls = index.get(g)
+                if urls is not None:
+                    urls.discard(url)
+
+    def _index_grams(self, site: str, url: str, title: Optional[str]) -> None:
+        grams = _title_grams(title)
+        self._item_grams.setdefault(site, {})[url] = _GRAM_SEP.join(sorted(grams))
+        index = self._gram_index.get(site)
+        if index is not None:
+            for g in grams:
+                index.setdefault(g, set()).add(url)
+
+    def _site_gram_index(self, site: str) -> Dict[str, Set[str]]:
+        index = self._gram_index.get(site)
+        if index is None:
+            index = {}
+            for url, grams in self._item_grams.get(site, {}).items():
+                if grams:
+                    for g in grams.split(_GRAM_SEP):
+                        index.setdefault(g, set()).add(url)
+            self._gram_index[site] = index
+        return index
+
+    def _upsert(self, site: str, entry: Dict[str, Any]) -> None:
+        by_url = self._items.setdefault(site, {})
+        key_url = (entry.get("url") or "").strip()
+        key_title = _title_key(entry.get("title"))
+        old_url = key_url if key_url in by_url else self._titles.get(site, {}).get(key_title)
+
+        fields = {k: v for k, v in entry.items() if v is not None}
+        origin, patch = None, dict(fields)
+        if old_url is not None and old_url in by_url:
+            item = by_url[old_url]
+            self._unindex_title(site, _title_key(item.get("title")), old_url)
+            self._unindex_grams(site, old_url)
+            item.update(fields)
+            item["saved_at"] = _now_ts()
+            new_url = (item.get("url") or "").strip()
+            prev = self._pending.pop((site, old_url), None)
+            if prev is not None:
+                origin, patch = prev[0], {**prev[1], **fields}
+            if new_url != old_url:
+                # matched on title: move the item (and queries pointing at it) to the new URL
+                origin = origin or old_url
+                del by_url[old_url]
+                for q, url in self._queries.get(site, {}).items():
+                    if url == old_url:
+                        self._queries[site][q] = new_url
+        else:
+            item = dict(fields)
+            item["saved_at"] = _now_ts()
+            new_url = (item.get("url") or "").strip()
+        by_url[new_url] = item
+        self._index_title(site, _title_key(item.get("title")), new_url)
+        self._index_grams(site, new_url, item.get("title"))
+        self._pending[(site, new_url)] = (origin, patch)
+
+    def upsert(self, site: str, entry: Dict[str, Any]) -> None:
+        with self.batch():
+            self._upsert(site, entry)
+
+    def upsert_for_query(self, site: str, query: str, entry: Dict[str, Any]) -> None:
+        url = (entry.get("url") or "").strip()
+        with self.batch():
+            self._upsert(site, entry)
+            if url:
+                q = _norm_query(query)
+                self._queries.setdefault(site, {})[q] = url
+                self._dirty_queries[(site, q)] = url
+                if self._negative.get(site, {}).pop(q, None) is not None:
+                    self._dirty_negative[(site, q)] = None
+
+    def mark_negative(self, site: str, query: str, reason: str) -> None:
+        q = _norm_query(query)
+        neg = (reason, _now_ts())
+        with self.batch():
+            self._negative.setdefault(site, {})[q] = neg
+            self._dirty_negative[(site, q)] = neg
+
+    def replace_items(self, data: Dict[str, list]) -> None:
+        with self.batch():
+            self._items, self._titles = {}, {}
+            self._item_grams, self._gram_index = {}, {}
+            for site, entries in data.items():
+                by_url = self._items.setdefault(site, {})
+                for it in entries or []:
+                    url = (it.get("url") or "").strip()
+                    by_url[url] = it
+                    self._index_title(site, _title_key(it.get("title")), url)
+                    self._index_grams(site, url, it.get("title"))
+            self._replace_all = True
+
+    # --- reading ---
+    def site_items(self, site: str) -> list:
+        with self._lock:
+            self._refresh()
+            return list(self._items.get(site, {}).values())
+
+    def candidates(self, site: str, query: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Items sharing the most trigrams with `query`, best first.
+
+        At least `limit` items when that many share a gram; items tied with
+        the last one kept are all returned, so the cut never depends on the
+        order of equal counts. Returns None when the query has no grams to
+        look up; callers should then fall back to scanning every item.
+        """
+        grams = _title_grams(query)
+        if not grams:
+            return None
+        with self._lock:
+            self._refresh()
+            index = self._site_gram_index(site)
+            hits: Counter = Counter()
+            for g in grams:
+                hits.update(index.get(g, ()))
+            by_url = self._items.get(site, {})
+            ranked = hits.most_common()
+            if len(ranked) > limit:
+                floor = ranked[limit - 1][1]
+                ranked = [(url, n) for url, n in ranked if n >= floor]
+            return [by_url[url] for url, _ in ranked if url in by_url]
+
+    def all_items(self) -> Dict[str, list]:
+        with self._lock:
+            self._refresh()
+            return {site: [dict(it) for it in by_url.values()] for site, by_url in self._items.items()}
+
+    def by_url(self, site: str, url: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            it = self._items.get(site, {}).get((url or "").strip())
+            return dict(it) if it is not None else None
+
+    def url_for_query(self, site: str, query: str) -> Optional[str]:
+        with self._lock:
+            self._refresh()
+            return self._queries.get(site, {}).get(_norm_query(query))
+
+    def negative(self, site: str, query: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            self._refresh()
+            return self._negative.get(site, {}).get(_norm_query(query))
+
+
+_store = _CacheStore()
+
+
+def batch():
+    """Group several cache writes into a single database transaction.
+
+    Example:
+        with cache.batch():
+            for entry in results:
+                cache.upsert(site, entry)
+    """
+    return _store.batch()
+
+
+def load_cache() -> Dict[str, list]:
+    """Load all items grouped per site."""
+    try:
+        return _store.all_items()
+    except sqlite3.Error:
+        return {}
 
 
 def save_cache(data: Dict[str, list]) -> None:
-    """Save items while preserving query_index if present."""
-    _ensure_cache_dir()
-    raw = _load_raw()
-    raw["items"] = data
+    """Replace all items with `data` while preserving the query index."""
     try:
-        with open(CACHE_FILE, "w", encoding="utf-8") as f:
-            json.dump(raw, f, ensure_ascii=False, indent=2)
-    except Exception:
-        pass
+        _store.replace_items(data)
+    except sqlite3.Error as e:
+        _log.warning("cache write failed: %s", e)
 
 
 def upsert(site: str, entry: Dict[str, Any]) -> None:
     """Insert or update an entry for a site based on URL or title."""
-    cache = load_cache()
-    items = cache.get(site, [])
-    key_url = (entry.get("url") or "").strip()
-    key_title = (entry.get("title") or "").strip().lower()
-
-    updated = False
-    for it in items:
-        if (it.get("url") or "").strip() == key_url or (it.get("title") or "").strip().lower() == key_title:
-            it.update({k: v for k, v in entry.items() if v is not None})
-            it["saved_at"] = _now_ts()
-            updated = True
-            break
-
-    if not updated:
-        new_item = {k: v for k, v in entry.items() if v is not None}
-        new_item["saved_at"] = _now_ts()
-        items.append(new_item)
-
-    cache[site] = items
-    save_cache(cache)
+    try:
+        _store.upsert(site, entry)
+    except sqlite3.Error as e:
+        _log.warning("cache write failed: %s", e)
 
 
-def find_best(site: str, query: str, *, scorer) -> Optional[Dict[str, Any]]:
+def find_best(site: str, query: str, *, scorer=None, batch_scorer=None) -> Optional[Dict[str, Any]]:
     """Return best cached match for site using provided scorer(title, query)->score.
 
-    Requires a scorer function to avoid coupling with scraping module.
+    Requires a scorer function to avoid coupling with scraping module. A
+    batch_scorer(titles, query)->scores (e.g. scrapers.utils._score_titles)
+    scores all candidates in one call and is preferred when given. Only the
+    FIND_BEST_CANDIDATES titles sharing the most trigrams with the query,
+    plus every title tied with the last of them, are scored; a title that
+    shares none cannot reach the match threshold anyway.
     """
-    cache = load_cache()
-    items = cache.get(site, [])
+    if scorer is None and batch_scorer is None:
+        raise TypeError("find_best() needs a scorer or a batch_scorer")
+    try:
+        items = _store.candidates(site, query, FIND_BEST_CANDIDATES)
+        if items is None:
+            items = _store.site_items(site)
+    except sqlite3.Error:
+        return None
     best = None
     best_score = 0.0
     q = (query or "").strip()
-    for it in items:
-        title = it.get("title") or ""
-        score = float(scorer(title, q))
+    titles = [it.get("title") or "" for it in items]
+    if batch_scorer is not None:
+        scores = batch_scorer(titles, q) if titles else []
+    else:
+        scores = [scorer(title, q) for title in titles]
+    for it, score in zip(items, scores):
+        score = float(score)
         if score > best_score:
             best = it
             best_score = score
     # Consider a strong match threshold to return immediately
     if best and best_score >= 90:
-        return best
+        return dict(best)
     return None
 
 
@@ -110,38 +721,192 @@ def _norm_query(s: str) -> str:
 
 def upsert_for_query(site: str, query: str, entry: Dict[str, Any]) -> None:
     """Upsert item and map exact normalized query -> entry URL for this site."""
-    upsert(site, entry)
-    raw = _load_raw()
-    qidx = raw.get("query_index") or {}
-    site_map = qidx.get(site) or {}
-    url = (entry.get("url") or "").strip()
-    if url:
-        site_map[_norm_query(query)] = url
-        qidx[site] = site_map
-        raw["query_index"] = qidx
-        try:
-            _ensure_cache_dir()
-            with open(CACHE_FILE, "w", encoding="utf-8") as f:
-                json.dump(raw, f, ensure_ascii=False, indent=2)
-        except Exception:
-            pass
+    try:
+        _store.upsert_for_query(site, query, entry)
+    except sqlite3.Error as e:
+        _log.warning("cache write failed: %s", e)
 
 
 def _find_by_url(site: str, url: str) -> Optional[Dict[str, Any]]:
-    url = (url or "").strip()
-    items = load_cache().get(site, [])
-    for it in items:
-        if (it.get("url") or "").strip() == url:
-            return it
-    return None
+    try:
+        return _store.by_url(site, url)
+    except sqlite3.Error:
+        return None
+
+
+def item_age(item: Dict[str, Any], now: Optional[float] = None) -> Optional[float]:
+    """Seconds since the item was saved, or None when it has no saved_at."""
+    saved_at = item.get("saved_at")
+    if not isinstance(saved_at, (int, float)):
+        return None
+    return max(0.0, (now if now is not None else _now_ts()) - saved_at)
+
 
+def is_stale(site: str, item: Dict[str, Any]) -> bool:
+    """True once the item is older than the site's TTL (or its age is unknown)."""
+    age = item_age(item)
+    return age is None or age > CACHE_TTL.get(site, DEFAULT_TTL)
 
-def get_for_query(site: str, query: str) -> Optional[Dict[str, Any]]:
-    """Return cached item for exact normalized query if available."""
-    raw = _load_raw()
-    qidx = raw.get("query_index") or {}
-    site_map = qidx.get(site) or {}
-    url = site_map.get(_norm_query(query))
+
+def is_expired(site: str, item: Dict[str, Any], max_age: Optional[float] = None) -> bool:
+    """True once the item is older than `max_age` (default: the site's CACHE_MAX_AGE) and must not be served."""
+    age = item_age(item)
+    limit = max_age if max_age is not None else CACHE_MAX_AGE.get(site, DEFAULT_MAX_AGE)
+    return age is None or age > limit
+
+
+def get_for_query(site: str, query: str, *, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """Return cached item for exact normalized query if available.
+
+    Items older than `max_age` (default: the site's CACHE_MAX_AGE) are not
+    returned; use is_stale to decide whether a returned item needs a refresh.
+    """
+    try:
+        url = _store.url_for_query(site, query)
+    except sqlite3.Error:
+        return None
     if not url:
         return None
-    return _find_by_url(site, url)
+    item = _find_by_url(site, url)
+    if item is None:
+        return None
+    if is_expired(site, item, max_age):
+        return None
+    return item
+
+
+def upsert_negative(site: str, query: str, reason: str) -> None:
+    """Remember that `query` found nothing on `site`, and why (one of the NEG_* codes)."""
+    try:
+        _store.mark_negative(site, query, reason)
+    except sqlite3.Error as e:
+        _log.warning("cache write failed: %s", e)
+
+
+def get_negative(site: str, query: str) -> Optional[Dict[str, Any]]:
+    """Return {"reason", "age"} if `query` recently found nothing on `site`.
+
+    Entries expire after NEGATIVE_TTL[reason]; a later hit for the same query
+    (upsert_for_query) clears them.
+    """
+    try:
+        neg = _store.negative(site, query)
+    except sqlite3.Error:
+        return None
+    if neg is None:
+        return None
+    reason, saved_at = neg
+    age = max(0.0, _now_ts() - saved_at)
+    if age > NEGATIVE_TTL.get(reason, 0):
+        return None
+    return {"reason": reason, "age": age}
+
+
+# --- price history ---
+# price_history is append-only: a row per (site, url) whenever the price or
+# title differs from the previous row, so it grows with changes, not with
+# catalog size. Rows come from crawls (begin_crawl / record_prices /
+# finish_crawl) and from live searches going through upsert (crawl_id NULL).
+
+
+def begin_crawl(site: str, source: Optional[str] = None) -> Optional[int]:
+    """Start a crawl of `site`; returns its id for record_prices / finish_crawl."""
+    try:
+        conn = _connect()
+        with _transaction(conn):
+            cur = conn.execute(
+                "INSERT INTO crawls (site, source, started_at) VALUES (?, ?, ?)", (site, source, _now_ts())
+            )
+            return cur.lastrowid
+    except sqlite3.Error as e:
+        _log.warning("cache write failed: %s", e)
+        return None
+
+
+def record_prices(site: str, records: List[Dict[str, Any]], *, crawl_id: Optional[int] = None) -> int:
+    """Add history rows for the records whose price or title changed; returns how many."""
+    now = _now_ts()
+    try:
+        conn = _connect()
+        with _transaction(conn):
+            changed = sum(_record_price(conn, site, rec, crawl_id, now) for rec in records)
+            if crawl_id is not None:
+                conn.execute(
+                    "UPDATE crawls SET seen = seen + ?, changed = changed + ? WHERE id = ?",
+                    (len(records), changed, crawl_id),
+                )
+        return changed
+    except sqlite3.Error as e:
+        _log.warning("cache write failed: %s", e)
+        return 0
+
+
+def finish_crawl(crawl_id: int) -> None:
+    """Mark a crawl complete; price_changes(site, crawl_id) starts after this point."""
+    try:
+        conn = _connect()
+        with _transaction(conn):
+            conn.execute(
+                "UPDATE crawls SET finished_at = ?, last_row = (SELECT MAX(id) FROM price_history) WHERE id = ?",
+                (_now_ts(), crawl_id),
+            )
+    except sqlite3.Error as e:
+        _log.warning("cache write failed: %s", e)
+
+
+def last_crawl(site: str, source: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """The most recent finished crawl of `site` (that wrote `source`, if given), or None."""
+    sql = "SELECT id, source, started_at, finished_at, seen, changed FROM crawls WHERE site = ? AND finished_at IS NOT NULL"
+    params: Tuple[Any, ...] = (site,)
+    if source is not None:
+        sql += " AND source = ?"
+        params += (source,)
+    try:
+        row = _connect().execute(sql + " ORDER BY id DESC LIMIT 1", params).fetchone()
+    except sqlite3.Error:
+        return None
+    if row is None:
+        return None
+    return dict(zip(("id", "source", "started_at", "finished_at", "seen", "changed"), row))
+
+
+def price_changes(site: str, since_crawl: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Price/title changes on `site` recorded after crawl `since_crawl`, oldest first.
+
+    Each change carries the new title and price, the previous ones (None for
+    a URL seen for the first time), the crawl it came from (None for a live
+    search) and when it was seen. Without `since_crawl`, the whole history.
+    """
+    try:
+        conn = _connect()
+        after = 0
+        if since_crawl is not None:
+            row = conn.execute(
+                "SELECT COALESCE(last_row, (SELECT MAX(id) FROM price_history WHERE crawl_id = crawls.id), 0) "
+                "FROM crawls WHERE id = ?",
+                (since_crawl,),
+            ).fetchone()
+            after = row[0] if row else 0
+        rows = conn.execute(
+            "SELECT h.url, h.title, h.price, h.crawl_id, h.seen_at, p.title, p.price "
+            "FROM price_history h LEFT JOIN price_history p ON p.id = ("
+            "    SELECT MAX(id) FROM price_history WHERE site = h.site AND url = h.url AND id < h.id) "
+            "WHERE h.site = ? AND h.id > ? ORDER BY h.id",
+            (site, after),
+        ).fetchall()
+    except sqlite3.Error:
+        return []
+    keys = ("url", "title", "price", "crawl_id", "seen_at", "old_title", "old_price")
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def price_history(site: str, url: str) -> List[Dict[str, Any]]:
+    """Every recorded (title, price) of one product, oldest first."""
+    try:
+        rows = _connect().execute(
+            "SELECT title, price, crawl_id, seen_at FROM price_history WHERE site = ? AND url = ? ORDER BY id",
+            (site, (url or "").strip()),
+        ).fetchall()
+    except sqlite3.Error:
+        return []
+    return [dict(zip(("title", "price", "crawl_id", "seen_at"), row)) for row in rows]
@@ -1,60 +1,71 @@
-from scrapers import _build_driver, search_altex, search_emag, search_vexio, search_pcgarage, search_evomag
+import sys
+import time
+
+_import_start = time.perf_counter()
+from scrapers import SITE_LABELS, search_all  # noqa: E402
+from scrapers.refresh import REFRESHER  # noqa: E402
+from scrapers.utils import DriverPool, _record_timing, startup_report  # noqa: E402
+
+_record_timing("imports", time.perf_counter() - _import_start)
+
+
+def _freshness(result):
+    """Short note on where the price came from, e.g. "din cache, acum 3 h, se actualizează"."""
+    if not result.get("cached"):
+        return ""
+    age = result.get("age") or 0
+    origin = "din catalog" if result.get("source") == "catalog" else "din cache"
+    if age < 3600:
+        note = f"{origin}, acum {int(age // 60)} min"
+    else:
+        note = f"{origin}, acum {age / 3600:.0f} h"
+    if result.get("refreshing"):
+        note += ", se actualizează"
+    return f" ({note})"
+
+
+def _print_specs(specs):
+    # Print a compact summary if available
+    attrs = specs.get("attributes")
+    if attrs and isinstance(attrs, dict):
+        # show top 5 attributes
+        print("Specificatii (partial):")
+        count = 0
+        for k, v in attrs.items():
+            print(f" - {k}: {v}")
+            count += 1
+            if count >= 5:
+                break
+    elif specs.get("specs_text"):
+        print("Specificatii:")
+        lines = specs["specs_text"].splitlines()[0:10]
+        print("\n".join(lines))
+
 
 if __name__ == "__main__":
     product = input("Introdu numele produsului: ")
 
-    driver = _build_driver()
-    try:
-        # print("\nCel mai bun rezultat pe eVoMag...")
-        # evomag_result = search_evomag(product, driver)
-        # if evomag_result:
-        #     print(f"{evomag_result['title']} - {evomag_result['price']} Lei\n{evomag_result['url']}")
-        # else:
-        #     print("Nu s-au găsit produse potrivite pe eVoMag.")
-
-        print("\nCel mai bun rezultat pe PC Garage...")
-        pcgarage_result = search_pcgarage(product, driver)
-        if pcgarage_result:
-            print(f"{pcgarage_result['title']} - {pcgarage_result['price']} Lei\n{pcgarage_result['url']}")
-            specs = pcgarage_result.get("specs")
-            if specs:
-                # Print a compact summary if available
-                attrs = specs.get("attributes")
-                if attrs and isinstance(attrs, dict):
-                    # show top 5 attributes
-                    print("Specificatii (partial):")
-                    count = 0
-                    for k, v in attrs.items():
-                        print(f" - {k}: {v}")
-                        count += 1
-                        if count >= 5:
-                            break
-                elif specs.get("specs_text"):
-                    print("Specificatii:")
-                    lines = specs["specs_text"].splitlines()[0:10]
-                    print("\n".join(lines))
-        else:
-            print("Nu s-au găsit produse potrivite pe PC Garage.")
-
-        # print("\nCel mai bun rezultat pe Vexio...")
-        # vexio_result = search_vexio(product, driver)
-        # if vexio_result:
-        #     print(f"{vexio_result['title']} - {vexio_result['price']} Lei\n{vexio_result['url']}")
-        # else:
-        #     print("Nu s-au găsit produse potrivite pe Vexio.")
-
-        # print("\nCel mai bun rezultat pe Altex...")
-        # altex_result = search_altex(product, driver)
-        # if altex_result:
-        #     print(f"{altex_result['title']} - {altex_result['price']} Lei\n{altex_result['url']}")
-        # else:
-        #     print("Nu s-au găsit produse potrivite pe Altex.")
-
-        # print("\nCel mai bun rezultat pe eMAG...")
-        # emag_result = search_emag(product, driver)
-        # if emag_result:
-        #     print(f"{emag_result['title']} - {emag_result['price']} Lei\n{emag_result['url']}")
-        # else:
-        #     print("Nu s-au găsit produse potrivite pe eMAG.")
-    finally:
-        driver.quit()
+    # sites are searched concurrently; each result is printed as soon as it arrives.
+    # Chrome is only started for sites that need it, at most two at a time;
+    # background refreshes of stale cache hits lease from the same pool.
+    with DriverPool(size=2) as pool:
+        REFRESHER.pool = pool
+        for site, result in search_all(product, pool=pool):
+            label = SITE_LABELS[site]
+            print(f"\nCel mai bun rezultat pe {label}...")
+            if result:
+                print(f"{result['title']} - {result['price']} Lei{_freshness(result)}\n{result['url']}")
+                specs = result.get("specs")
+                if specs:
+                    _print_specs(specs)
+            else:
+                print(f"Nu s-au găsit produse potrivite pe {label}.")
+
+        # finish the refreshes while the pool is still open, so the next run sees the new prices
+        if REFRESHER.pending():
+            print("\nSe actualizează în fundal prețurile vechi din cache...")
+        REFRESHER.close(wait=True)
+
+    if "--timings" in sys.argv[1:]:
+        print("\nTimpi de pornire:")
+        print(startup_report())
@@ -4,6 +4,7 @@ from .emag import search_emag
 from .altex import search_altex
 from .vexio import search_vexio
 from .evomag import search_evomag
+from .orchestrator import REFRESHERS, SEARCHERS, SITE_LABELS, refresh_price, refresh_prices, search_all
 
 __all__ = [
     "_build_driver",
@@ -12,4 +13,10 @@ __all__ = [
     "search_altex",
     "search_vexio",
     "search_evomag",
+    "search_all",
+    "refresh_price",
+    "refresh_prices",
+    "REFRESHERS",
+    "SEARCHERS",
+    "SITE_LABELS",
 ]
@@ -0,0 +1,316 @@
+"""Offline catalog search over the standalone crawlers' dumps.
+
+Each dump becomes a segment: a columnar snapshot (scrapers/snapshot.py)
+plus an inverted index over _tokenize_words (sorted vocabulary blob +
+offsets, uint32 posting lists + offsets), all opened with mmap_mode="r". A lookup reads only the
+posting lists of the query's words and the titles of the best-covered
+documents, which are then reranked with the precise title scorer.
+
+Builds are incremental per dump: a segment is rewritten only when its
+source file changed since the last build. A hit's `saved_at` is when the
+crawl that wrote the dump finished, as recorded in the cache database
+(cache.last_crawl); a file's mtime only says when it was last checked out
+or copied. Dumps without a recorded crawl have no age, and their hits are
+re-priced before they are shown.
+
+Usage:
+    python -m scrapers.catalog build [site ...]
+    python -m scrapers.catalog search <site> <query>
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .sink import iter_records
+from .snapshot import Snapshot, SnapshotWriter
+from .utils import DATA_DIR, _score_titles, _tokenize_words
+
+try:
+    from cache import last_crawl
+except Exception:
+    last_crawl = None
+
+CATALOG_DIR = os.path.join(DATA_DIR, "catalog")
+_STANDALONE = os.path.join(os.path.dirname(DATA_DIR), "standalone")
+# Dumps indexed by `build` when no sources are given; missing files are skipped.
+CATALOG_SOURCES: Dict[str, List[str]] = {
+    "altex": [
+        os.path.join(_STANDALONE, "altex_crawler", name)
+        for name in ("altex_all_categories.json", "altex_all_categories.jsonl", "altex_all_categories.jsonl.gz")
+    ],
+    "vexio": [
+        os.path.join(_STANDALONE, "vexio_crawler", name)
+        for name in (
+            "vexio_products_ultrafast.json",
+            "vexio_products_ultrafast.jsonl",
+            "vexio_products_ultrafast.jsonl.gz",
+            "vexio_all_categories.jsonl",
+        )
+    ],
+}
+# Documents reranked per lookup, picked by how many query words they contain.
+CATALOG_CANDIDATES = 200
+# Precise-score threshold for a catalog answer; stricter than a live search
+# page, since the whole catalog is searched rather than the shop's own results.
+CATALOG_MIN_SCORE = 90
+# Points the answer must lead the best-scoring other product by. A query that
+# fits many products ("frigider samsung" also matches every Samsung fridge
+# shelf) is left to the live search, whose ranking knows what is a fridge.
+CATALOG_MIN_MARGIN = 10
+
+# Bumped when the segment layout changes; segments of another version are rebuilt.
+_FORMAT = 2
+_INDEX_ARRAYS = ("vocab_bytes", "vocab_offsets", "postings", "posting_offsets")
+
+
+def _pack(strings: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _write_segment(path: str, records: Iterable[Dict[str, Any]]) -> int:
+    """Snapshot `records` with an inverted title index into `path`; returns the document count."""
+    writer = SnapshotWriter(path)
+    index: Dict[str, List[int]] = {}
+    for rec in records:
+        doc = writer.add(rec)
+        if doc >= 0:
+            for tok in set(_tokenize_words(rec["title"].strip())):
+                index.setdefault(tok, []).append(doc)
+    if not len(writer):
+        return 0
+
+    vocab = sorted(index)
+    posting_offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+    np.cumsum([len(index[t]) for t in vocab], out=posting_offsets[1:])
+    postings = np.fromiter((d for t in vocab for d in index[t]), dtype=np.uint32, count=int(posting_offsets[-1]))
+    vocab_bytes, vocab_offsets = _pack(vocab)
+    return writer.close(
+        {
+            "vocab_bytes": vocab_bytes,
+            "vocab_offsets": vocab_offsets,
+            "postings": postings,
+            "posting_offsets": posting_offsets,
+        }
+    )
+
+
+class _Segment(Snapshot):
+    """A snapshot plus its inverted index, memory-mapped."""
+
+    def __init__(self, path: str, crawled_at: Optional[float]):
+        super().__init__(path, _INDEX_ARRAYS)
+        self.crawled_at = crawled_at
+
+    def _token_id(self, token: str) -> int:
+        """Binary search of the sorted vocabulary; -1 if absent."""
+        key = token.encode("utf-8")
+        lo, hi = 0, len(self.vocab_offsets) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.vocab_bytes[self.vocab_offsets[mid]:self.vocab_offsets[mid + 1]].tobytes() < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self.vocab_offsets) - 1 and self._str(self.vocab_bytes, self.vocab_offsets, lo) == token:
+            return lo
+        return -1
+
+    def matches(self, tokens: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(doc ids, number of query tokens each contains)."""
+        lists = []
+        for tok in tokens:
+            tid = self._token_id(tok)
+            if tid >= 0:
+                lists.append(self.postings[self.posting_offsets[tid]:self.posting_offsets[tid + 1]])
+        if not lists:
+            return np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(lists), return_counts=True)
+
+
+class Catalog:
+    """Offline search index of one site, stored under CATALOG_DIR/<site>."""
+
+    def __init__(self, site: str, root: str = CATALOG_DIR):
+        self.site = site
+        self.dir = os.path.join(root, site)
+        self._lock = threading.Lock()
+        self._segments: List[_Segment] = []
+        self._sig: Optional[Tuple[int, int]] = None
+
+    @property
+    def _manifest_path(self) -> str:
+        return os.path.join(self.dir, "manifest.json")
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self._manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    # --- building ---
+    def build(self, sources: Optional[List[str]] = None) -> int:
+        """(Re)index changed dumps; returns how many segments were rewritten."""
+        if sources is None:
+            sources = [p for p in CATALOG_SOURCES.get(self.site, []) if os.path.exists(p)]
+        os.makedirs(self.dir, exist_ok=True)
+        manifest = self._load_manifest()
+        previous = {seg["source"]: seg for seg in manifest.get("segments", [])} if manifest.get("format") == _FORMAT else {}
+        segments, rebuilt = [], 0
+        for src in sources:
+            src = os.path.abspath(src)
+            try:
+                st = os.stat(src)
+            except OSError:
+                continue
+            name = hashlib.sha1(src.encode("utf-8")).hexdigest()[:12]
+            prev = previous.get(src)
+            crawled_at = _crawled_at(self.site, src)
+            if (
+                prev
+                and prev["mtime_ns"] == st.st_mtime_ns
+                and prev["size"] == st.st_size
+                and (not prev["count"] or os.path.isdir(os.path.join(self.dir, name)))
+            ):
+                segments.append(dict(prev, crawled_at=crawled_at))
+                continue
+            try:
+                count = _write_segment(os.path.join(self.dir, name), iter_records(src))
+            except (OSError, ValueError, TypeError, AttributeError) as e:
+                print(f"[catalog] skipping {src}: {e}", file=sys.stderr)
+                continue
+            segments.append(
+                {
+                    "source": src,
+                    "name": name,
+                    "mtime_ns": st.st_mtime_ns,
+                    "size": st.st_size,
+                    "count": count,
+                    "crawled_at": crawled_at,
+                }
+            )
+            rebuilt += 1
+        keep = {seg["name"] for seg in segments}
+        for entry in os.listdir(self.dir):
+            if entry != "manifest.json" and entry not in keep:
+                shutil.rmtree(os.path.join(self.dir, entry), ignore_errors=True)
+        tmp = self._manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"site": self.site, "format": _FORMAT, "built_at": time.time(), "segments": segments}, f, indent=1)
+        os.replace(tmp, self._manifest_path)
+        return rebuilt
+
+    # --- searching ---
+    def _open(self) -> List[_Segment]:
+        """Segments of the current manifest, newest dump first; reopened after a rebuild."""
+        try:
+            st = os.stat(self._manifest_path)
+            sig = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return []
+        with self._lock:
+            if sig != self._sig:
+                segs = [s for s in self._load_manifest().get("segments", []) if s.get("count")]
+                segs.sort(key=lambda s: s["mtime_ns"], reverse=True)
+                self._segments = [_Segment(os.path.join(self.dir, s["name"]), s.get("crawled_at")) for s in segs]
+                self._sig = sig
+            return self._segments
+
+    def candidates(self, query: str, limit: int = CATALOG_CANDIDATES) -> List[Tuple[_Segment, int]]:
+        """Documents containing the most query words, across segments."""
+        tokens = set(_tokenize_words(query))
+        if not tokens:
+            return []
+        hits = []
+        for seg in self._open():
+            docs, counts = seg.matches(tokens)
+            if len(docs) > limit:
+                top = np.argpartition(-counts, limit - 1)[:limit]
+                docs, counts = docs[top], counts[top]
+            hits.extend((int(c), seg, int(d)) for d, c in zip(docs, counts))
+        hits.sort(key=lambda h: -h[0])  # stable: newest segment first among ties
+        return [(seg, doc) for _, seg, doc in hits[:limit]]
+
+    def search(
+        self, query: str, *, min_score: float = CATALOG_MIN_SCORE, min_margin: float = CATALOG_MIN_MARGIN
+    ) -> Optional[Dict[str, Any]]:
+        """Best priced match for `query`, shaped like a cache item (saved_at = crawl time).
+
+        None unless the match scores `min_score` and leads every other
+        product by `min_margin`.
+        """
+        cands = self.candidates(query)
+        if not cands:
+            return None
+        scores = _score_titles([seg.title(doc) for seg, doc in cands], query, precise=True)
+        order = np.argsort(-scores, kind="stable")
+        best = next((i for i in order if float(cands[i][0].prices[cands[i][1]]) > 0), None)
+        if best is None or scores[best] < min_score:
+            return None
+        seg, doc = cands[best]
+        url = seg.url(doc)
+        runner_up = next((scores[i] for i in order if i != best and cands[i][0].url(cands[i][1]) != url), 0.0)
+        if scores[best] - runner_up < min_margin:
+            return None
+        return {
+            "title": seg.title(doc),
+            "price": float(seg.prices[doc]),
+            "url": url,
+            "saved_at": seg.crawled_at,
+            "score": float(scores[best]),
+        }
+
+
+def _crawled_at(site: str, source: str) -> Optional[float]:
+    """When the last finished crawl that wrote `source` ended, or None if none is recorded."""
+    crawl = last_crawl(site, source) if last_crawl is not None else None
+    return crawl["finished_at"] if crawl else None
+
+
+_catalogs: Dict[str, Catalog] = {}
+
+
+def get_catalog(site: str) -> Catalog:
+    cat = _catalogs.get(site)
+    if cat is None:
+        cat = _catalogs.setdefault(site, Catalog(site))
+    return cat
+
+
+def catalog_lookup(site: str, query: str) -> Optional[Dict[str, Any]]:
+    """Catalog answer for `query` on `site`, or None (no index built, or no good match)."""
+    try:
+        return get_catalog(site).search(query)
+    except (OSError, ValueError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["build"]:
+        for site in argv[1:] or sorted(CATALOG_SOURCES):
+            start = time.perf_counter()
+            rebuilt = get_catalog(site).build()
+            print(f"{site}: {rebuilt} segment(s) rebuilt in {time.perf_counter() - start:.1f}s")
+    elif argv[:1] == ["search"] and len(argv) >= 3:
+        start = time.perf_counter()
+        hit = catalog_lookup(argv[1], " ".join(argv[2:]))
+        elapsed = (time.perf_counter() - start) * 1000
+        print(json.dumps(hit, ensure_ascii=False, indent=2) if hit else "no match")
+        print(f"({elapsed:.1f} ms)")
+    else:
+        print(__doc__.strip().split("Usage:")[-1])
+
+
+if __name__ == "__main__":
+    main()
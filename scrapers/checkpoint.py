@@ -0,0 +1,147 @@
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Set
+
+from .sink import JsonlSink, iter_jsonl
+
+try:
+    from cache import begin_crawl, finish_crawl, record_prices
+except Exception:
+    begin_crawl = None
+    finish_crawl = None
+    record_prices = None
+
+
+class CrawlCheckpoint:
+    """Progress log of a category crawl, so an interrupted run can resume.
+
+    Owns the output JsonlSink. After each completed page, commit_page()
+    writes the page's items, closes a sink checkpoint and appends one line to
+    the log at `path`: category, page, the page's URLs and the output offset.
+    Replaying the log gives, per category, the last completed page, the URLs
+    already seen and whether it finished; the output is cut back to the last
+    logged offset, so records of a page that never got logged are dropped.
+    Without `resume` both files start empty.
+
+    With `history` (a site name) each committed page is also recorded in the
+    cache's price history under one crawl id, kept across resumes; leaving
+    the `with` block normally marks that crawl finished.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        output: str,
+        *,
+        compress: Optional[str] = None,
+        resume: bool = False,
+        history: Optional[str] = None,
+    ):
+        self.path = path
+        self.output = output
+        self.history = history if begin_crawl is not None else None
+        self.crawl_id: Optional[int] = None
+        self._lock = threading.Lock()
+        self._pages: Dict[str, int] = {}
+        self._done: Set[str] = set()
+        self._seen: Dict[str, Set[str]] = {}
+        self.resumed_items = 0
+        offset = None
+        if resume and os.path.exists(path) and os.path.exists(output):
+            offset = self._replay()
+        if offset is None:
+            self._pages.clear()
+            self._done.clear()
+            self._seen.clear()
+            self.resumed_items = 0
+            self.crawl_id = None
+        if self.history and self.crawl_id is None:
+            self.crawl_id = begin_crawl(self.history, os.path.abspath(output))
+        self.sink = JsonlSink(output, compress=compress, resume_at=offset)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._start_log(offset or 0)
+
+    def _start_log(self, offset: int) -> None:
+        """Write the replayed state as a compact new log (dropping any torn last line)."""
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"output": os.path.abspath(self.output), "crawl_id": self.crawl_id}) + "\n")
+            for cat, page in self._pages.items():
+                rec = {"category": cat, "page": page, "offset": offset, "urls": sorted(self._seen.get(cat, ()))}
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            for cat in self._done:
+                f.write(json.dumps({"category": cat, "done": True, "offset": offset}, ensure_ascii=False) + "\n")
+        os.replace(tmp, self.path)
+        self._log = open(self.path, "a", encoding="utf-8")
+
+    def _replay(self) -> Optional[int]:
+        offset = None
+        for rec in iter_jsonl(self.path):
+            if "output" in rec:
+                if rec["output"] != os.path.abspath(self.output):
+                    return None  # log belongs to another output file
+                self.crawl_id = rec.get("crawl_id")
+                offset = 0
+                continue
+            cat = rec.get("category")
+            if not cat or offset is None:
+                continue
+            if rec.get("page"):
+                self._pages[cat] = max(self._pages.get(cat, 0), rec["page"])
+                urls = rec.get("urls") or []
+                self._seen.setdefault(cat, set()).update(urls)
+                self.resumed_items += len(urls)
+            if rec.get("done"):
+                self._done.add(cat)
+            offset = rec.get("offset", offset)
+        return offset
+
+    def _append(self, rec: Dict[str, Any]) -> None:
+        self._log.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        self._log.flush()
+
+    # --- progress ---
+    def is_done(self, category: str) -> bool:
+        return category in self._done
+
+    def next_page(self, category: str) -> int:
+        """First page of `category` not yet committed (1 on a fresh crawl)."""
+        return self._pages.get(category, 0) + 1
+
+    def seen(self, category: str) -> Set[str]:
+        """URLs already written for `category`; callers de-duplicate against it."""
+        with self._lock:
+            return self._seen.setdefault(category, set())
+
+    def commit_page(self, category: str, page: int, items: List[Dict[str, Any]]) -> None:
+        urls = [it["url"] for it in items if it.get("url")]
+        with self._lock:
+            self.sink.write_many(items)
+            offset = self.sink.checkpoint()
+            self._seen.setdefault(category, set()).update(urls)
+            self._pages[category] = max(self._pages.get(category, 0), page)
+            self._append({"category": category, "page": page, "offset": offset, "urls": urls})
+        if self.history and self.crawl_id is not None:
+            record_prices(self.history, items, crawl_id=self.crawl_id)
+
+    def finish_category(self, category: str) -> None:
+        with self._lock:
+            offset = self.sink.checkpoint()
+            self._done.add(category)
+            self._append({"category": category, "done": True, "offset": offset})
+
+    def close(self, *, finished: bool = False) -> None:
+        with self._lock:
+            if self._log.closed:
+                return
+            self.sink.close()
+            self._log.close()
+        if finished and self.history and self.crawl_id is not None:
+            finish_crawl(self.crawl_id)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        self.close(finished=exc_type is None)
@@ -0,0 +1,87 @@
+"""Price history of crawled catalogs, kept in the cache database.
+
+Usage:
+    python -m scrapers.history import <site> <dump>
+    python -m scrapers.history changes <site> [--since CRAWL_ID]
+    python -m scrapers.history show <site> <url>
+"""
+import argparse
+import os
+import time
+from itertools import islice
+from typing import List, Optional, Tuple
+
+from .sink import iter_records
+
+try:
+    from cache import begin_crawl, finish_crawl, last_crawl, price_changes, price_history, record_prices
+except Exception:
+    begin_crawl = None
+    finish_crawl = None
+    last_crawl = None
+    price_changes = None
+    price_history = None
+    record_prices = None
+
+# records per transaction when importing a dump
+IMPORT_CHUNK = 1000
+
+
+def import_dump(site: str, path: str) -> Tuple[Optional[int], int]:
+    """Record a crawler dump as one finished crawl; returns (crawl id, rows changed)."""
+    crawl_id = begin_crawl(site, os.path.abspath(path))
+    if crawl_id is None:
+        return None, 0
+    records = iter_records(path)
+    changed = 0
+    while True:
+        chunk = list(islice(records, IMPORT_CHUNK))
+        if not chunk:
+            break
+        changed += record_prices(site, chunk, crawl_id=crawl_id)
+    finish_crawl(crawl_id)
+    return crawl_id, changed
+
+
+def _fmt_price(price: Optional[float]) -> str:
+    return "-" if price is None else f"{price:.2f}"
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Price history of crawled catalogs")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    imp = sub.add_parser("import", help="record a .json / .jsonl dump as a crawl")
+    imp.add_argument("site")
+    imp.add_argument("dump")
+    chg = sub.add_parser("changes", help="price/title changes since a crawl")
+    chg.add_argument("site")
+    chg.add_argument("--since", type=int, default=None, help="crawl id (default: the last finished crawl)")
+    show = sub.add_parser("show", help="history of one product")
+    show.add_argument("site")
+    show.add_argument("url")
+    args = parser.parse_args(argv)
+
+    if begin_crawl is None:
+        raise SystemExit("the cache module is not available")
+    if args.cmd == "import":
+        start = time.perf_counter()
+        crawl_id, changed = import_dump(args.site, args.dump)
+        print(f"crawl {crawl_id}: {changed} change(s) recorded in {time.perf_counter() - start:.1f}s")
+    elif args.cmd == "changes":
+        since = args.since
+        if since is None:
+            last = last_crawl(args.site)
+            since = last["id"] if last else None
+        changes = price_changes(args.site, since)
+        for ch in changes:
+            print(f"{_fmt_price(ch['old_price']):>10} -> {_fmt_price(ch['price']):>10}  {ch['title']}\n{'':>24}{ch['url']}")
+        print(f"{len(changes)} change(s) since crawl {since}")
+    else:
+        for row in price_history(args.site, args.url):
+            stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(row["seen_at"]))
+            source = f"crawl {row['crawl_id']}" if row["crawl_id"] is not None else "live"
+            print(f"{stamp}  {_fmt_price(row['price']):>10}  ({source})  {row['title']}")
+
+
+if __name__ == "__main__":
+    main()
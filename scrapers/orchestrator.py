@@ -0,0 +1,199 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+from urllib.parse import urlparse
+
+from .utils import DriverPool, _build_driver
+from .pcgarage import refresh_pcgarage, search_pcgarage
+from .emag import refresh_emag, search_emag
+from .altex import refresh_altex, search_altex
+from .vexio import refresh_vexio, search_vexio
+from .evomag import refresh_evomag, search_evomag
+
+
+SEARCHERS: Dict[str, Callable] = {
+    "pcgarage": search_pcgarage,
+    "emag": search_emag,
+    "altex": search_altex,
+    "vexio": search_vexio,
+    "evomag": search_evomag,
+}
+
+# Price of a known product URL straight from its page: refresh(url, driver=None, *, query=None).
+REFRESHERS: Dict[str, Callable] = {
+    "pcgarage": refresh_pcgarage,
+    "emag": refresh_emag,
+    "altex": refresh_altex,
+    "vexio": refresh_vexio,
+    "evomag": refresh_evomag,
+}
+
+SITE_LABELS = {
+    "pcgarage": "PC Garage",
+    "emag": "eMAG",
+    "altex": "Altex",
+    "vexio": "Vexio",
+    "evomag": "eVoMag",
+}
+
+
+class _LazyDriver:
+    """Zero-argument driver factory that gets a driver at most once, on first use.
+
+    With a pool the driver is leased and handed back by release(); otherwise
+    it is built by `factory` and quit. A pool lease waits at most until
+    `deadline` (time.monotonic()); cancel() makes a pending or later call fail
+    instead of waiting for a slot.
+    """
+
+    def __init__(self, factory: Callable, pool: Optional[DriverPool] = None, *, deadline: Optional[float] = None):
+        self._factory = factory
+        self._pool = pool
+        self._deadline = deadline
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self.driver = None
+
+    def __call__(self):
+        with self._lock:
+            if self.driver is not None:
+                return self.driver
+        if self._cancel.is_set():
+            raise RuntimeError("driver request cancelled")
+        # acquired outside the lock: release()/cancel() must not wait on a pool slot
+        if self._pool is not None:
+            timeout = None if self._deadline is None else max(0.0, self._deadline - time.monotonic())
+            driver = self._pool.acquire(timeout, cancel=self._cancel)
+        else:
+            driver = self._factory()
+        with self._lock:
+            if self.driver is None and not self._cancel.is_set():
+                self.driver = driver
+                return driver
+            current = self.driver
+        # cancelled while waiting, or another caller got one first
+        self._discard(driver)
+        if current is None:
+            raise RuntimeError("driver request cancelled")
+        return current
+
+    def _discard(self, driver, *, broken: bool = False) -> None:
+        if self._pool is not None:
+            self._pool.release(driver, broken=broken)
+        else:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    def cancel(self) -> None:
+        self._cancel.set()
+        if self._pool is not None:
+            self._pool.wake()
+
+    def release(self, *, broken: bool = False) -> None:
+        """Hand the driver back (no-op if none was acquired)."""
+        with self._lock:
+            driver, self.driver = self.driver, None
+        if driver is not None:
+            self._discard(driver, broken=broken)
+
+
+def search_all(
+    product: str,
+    *,
+    sites: Optional[Iterable[str]] = None,
+    deadline: float = 60.0,
+    driver_factory: Callable = _build_driver,
+    pool: Optional[DriverPool] = None,
+) -> Iterator[Tuple[str, Optional[dict]]]:
+    """Search all sites concurrently, yielding (site, result) as each finishes.
+
+    Each site runs on its own thread with its own lazily started driver, so a
+    site served over HTTP never launches Chrome, and hosts are still throttled
+    independently. Sites that have not finished `deadline` seconds after the
+    call are yielded last with a None result and their drivers are shut down.
+    With a `pool`, drivers are leased from it instead of started per call.
+    """
+    names = [s for s in (sites or SEARCHERS) if s in SEARCHERS]
+    if not names:
+        return
+    end = time.monotonic() + deadline
+    drivers = {site: _LazyDriver(driver_factory, pool, deadline=end) for site in names}
+    executor = ThreadPoolExecutor(max_workers=len(names), thread_name_prefix="search")
+    futures = {executor.submit(SEARCHERS[site], product, drivers[site]): site for site in names}
+    done = set()
+    try:
+        for fut in as_completed(futures, timeout=max(0.0, end - time.monotonic())):
+            site = futures[fut]
+            done.add(site)
+            try:
+                result = fut.result()
+            except Exception:
+                result = None
+            drivers[site].release()
+            yield site, result
+    except TimeoutError:
+        for site in names:
+            if site not in done:
+                yield site, None
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        # sites still waiting for a pool slot give up; quitting a busy driver
+        # aborts its pending navigation
+        for d in drivers.values():
+            d.cancel()
+            d.release(broken=True)
+
+
+def site_for_url(url: str) -> Optional[str]:
+    """The SEARCHERS key whose shop serves `url`, or None."""
+    host = urlparse(url or "").netloc.lower()
+    return next((site for site in SEARCHERS if site in host), None)
+
+
+def refresh_price(url: str, driver=None, *, query: Optional[str] = None) -> Optional[dict]:
+    """Re-read the price of a known product URL on whichever site serves it."""
+    site = site_for_url(url)
+    if site is None:
+        return None
+    return REFRESHERS[site](url, driver, query=query)
+
+
+def refresh_prices(
+    urls: Iterable[str],
+    *,
+    workers: int = 4,
+    driver_factory: Callable = _build_driver,
+    pool: Optional[DriverPool] = None,
+) -> Iterator[Tuple[str, Optional[dict]]]:
+    """Refresh many product URLs, at most `workers` at a time, yielding (url, result) as each finishes.
+
+    Each URL costs one HTTP request while its site serves product pages over
+    HTTP; a driver is leased from `pool` only for URLs that need the browser.
+    Without a pool, one of `workers` drivers (built by `driver_factory` on
+    first need) is kept for the whole batch and quit at the end. Hosts are
+    still paced by RATE_LIMITER, so extra workers mostly overlap different shops.
+    """
+    own_pool = pool is None
+    if own_pool:
+        pool = DriverPool(size=max(1, workers), factory=driver_factory)
+
+    def one(url: str) -> Optional[dict]:
+        driver = _LazyDriver(driver_factory, pool)
+        try:
+            return refresh_price(url, driver)
+        except Exception:
+            return None
+        finally:
+            driver.release()
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="refresh-url") as executor:
+            futures = {executor.submit(one, url): url for url in dict.fromkeys(urls)}
+            for fut in as_completed(futures):
+                yield futures[fut], fut.result()
+    finally:
+        if own_pool:
+            pool.close()
@@ -1,118 +1,133 @@
 from typing import Any, Dict
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 
-from .utils import _throttled_get, _precise_match_score
+from . import utils
+from .refresh import _live_result, _make_refresher, _serve_cached
+from .utils import (
+    _search_page,
+    _html_root,
+    _select,
+    _select_one,
+    _node_text,
+)
 
 try:
     from cache import (
         get_for_query as cache_get_for_query,
+        get_negative as cache_get_negative,
         upsert_for_query as cache_upsert_for_query,
         upsert as cache_upsert,
+        upsert_negative as cache_upsert_negative,
     )
 except Exception:
     cache_get_for_query = None
+    cache_get_negative = None
     cache_upsert_for_query = None
     cache_upsert = None
+    cache_upsert_negative = None
+
+
+_CARD_SPEC = {
+    "card": "div.product_b_container",
+    "fields": {
+        "title": ("div.product_box_name h2 a", "text"),
+        "price_text": ("div.product_box_price_container p.price", "text"),
+        "href": ("div.product_box_name h2 a", "href"),
+    },
+}
+
+# Product page fallbacks for when the page has no schema.org JSON-LD / price meta.
+_PRODUCT_SPEC = {
+    "title": "h1.page-title",
+    "price": "p.price",
+}
+
+
+_SPECS_SPEC = {
+    "title": "h1.page-title",
+    "blocks": "#tab-specs, div#product-specs, div.specs, div#specificatii",
+    "rows": "table tr",
+    "key": "th, td:nth-child(1)",
+    "value": "td:nth-child(2)",
+}
+
+# Whole spec sheet in one WebDriver round-trip instead of two find_element calls per row.
+_EXTRACT_SPECS_JS = """
+const spec = arguments[0];
+const text = (el) => (el ? (el.innerText || "").trim() : "");
+const out = {};
+const title = text(document.querySelector(spec.title));
+if (title) out.title = title;
+const texts = Array.from(document.querySelectorAll(spec.blocks)).map(text).filter(Boolean);
+if (texts.length) out.specs_text = texts.join("\\n").slice(0, 5000);
+const kv = {};
+for (const row of document.querySelectorAll(spec.rows)) {
+  const k = text(row.querySelector(spec.key));
+  const v = text(row.querySelector(spec.value));
+  if (k && v) kv[k] = v;
+}
+if (Object.keys(kv).length) out.attributes = kv;
+return out;
+"""
+
+
+def _parse_pcgarage_specs(html: str) -> dict:
+    """Same output as _EXTRACT_SPECS_JS, computed from an HTML snapshot."""
+    root = _html_root(html)
+    specs: Dict[str, Any] = {}
+    title = _node_text(_select_one(root, _SPECS_SPEC["title"]))
+    if title:
+        specs["title"] = title
+    texts = [t for t in (_node_text(b, "\n") for b in _select(root, _SPECS_SPEC["blocks"])) if t]
+    if texts:
+        specs["specs_text"] = "\n".join(texts)[:5000]
+    kv = {}
+    for row in _select(root, _SPECS_SPEC["rows"]):
+        k = _node_text(_select_one(row, _SPECS_SPEC["key"]))
+        v = _node_text(_select_one(row, _SPECS_SPEC["value"]))
+        if k and v:
+            kv[k] = v
+    if kv:
+        specs["attributes"] = kv
+    return specs
+
+
+def _browser_pcgarage_specs(driver, html: str) -> dict:
+    if utils.PARSE_MODE == "html" and html:
+        return _parse_pcgarage_specs(html)
+    return driver.execute_script(_EXTRACT_SPECS_JS, _SPECS_SPEC) or {}
 
 
 def _extract_pcgarage_specs(product_url: str, driver) -> dict:
     specs: Dict[str, Any] = {}
     try:
-        _throttled_get(driver, product_url)
-        try:
-            title = driver.find_element(By.CSS_SELECTOR, "h1.page-title").text.strip()
-            specs["title"] = title
-        except Exception:
-            pass
-        try:
-            blocks = driver.find_elements(By.CSS_SELECTOR, "#tab-specs, div#product-specs, div.specs, div#specificatii")
-            if blocks:
-                texts = []
-                for b in blocks:
-                    try:
-                        texts.append(b.text)
-                    except Exception:
-                        continue
-                if texts:
-                    joined = "\n".join(t.strip() for t in texts if t)
-                    if joined:
-                        specs["specs_text"] = joined[:5000]
-        except Exception:
-            pass
-        try:
-            rows = driver.find_elements(By.CSS_SELECTOR, "table tr")
-            kv = {}
-            for r in rows:
-                try:
-                    th = r.find_element(By.CSS_SELECTOR, "th, td:nth-child(1)").text.strip()
-                    td = r.find_element(By.CSS_SELECTOR, "td:nth-child(2)").text.strip()
-                    if th and td:
-                        kv[th] = td
-                except Exception:
-                    continue
-            if kv:
-                specs["attributes"] = kv
-        except Exception:
-            pass
+        specs = utils.FETCHER.fetch(
+            "pcgarage",
+            product_url,
+            driver,
+            parse=lambda html, _url: _parse_pcgarage_specs(html),
+            browser=_browser_pcgarage_specs,
+            ready=_SPECS_SPEC["blocks"],
+            kind="product",
+        ) or {}
     except Exception:
         pass
     return specs
 
 
-def search_pcgarage(product_name: str, driver):
-    # exact per-query cache first
-    if cache_get_for_query is not None:
+def search_pcgarage(product_name: str, driver, *, use_cache: bool = True):
+    # exact per-query cache first; a stale hit is served and refreshed in the background
+    if use_cache and cache_get_for_query is not None:
         cached = cache_get_for_query("pcgarage", product_name)
         if cached:
-            return {
-                "title": cached.get("title"),
-                "price": cached.get("price"),
-                "url": cached.get("url"),
-                "specs": cached.get("specs"),
-            }
-
-    best_result = None
-    best_score = 0.0
+            return _serve_cached("pcgarage", product_name, cached, search_pcgarage)
+        # recently found nothing: skip the page load until the negative entry expires
+        if cache_get_negative is not None and cache_get_negative("pcgarage", product_name):
+            return None
+
+    best_result, miss = None, None
     try:
         url = f"https://www.pcgarage.ro/cauta/{product_name.replace(' ', '+')}/"
-        _throttled_get(driver, url)
-        WebDriverWait(driver, 5).until(
-            EC.presence_of_all_elements_located(
-                (By.CSS_SELECTOR, "div.product_b_container")
-            )
-        )
-        products = driver.find_elements(By.CSS_SELECTOR, "div.product_b_container")
-        for p in products:
-            try:
-                title = p.find_element(By.CSS_SELECTOR, "div.product_box_name h2 a").text.strip()
-                score = _precise_match_score(title, product_name)
-                if score < 60:
-                    continue
-                price = None
-                try:
-                    price_text = (
-                        p.find_element(By.CSS_SELECTOR, "div.product_box_price_container p.price")
-                        .text.replace("RON", "")
-                        .replace("\u00a0", "")
-                        .replace(",", ".")
-                    )
-                    price = float(price_text)
-                except Exception:
-                    pass
-                link = None
-                try:
-                    link = p.find_element(By.CSS_SELECTOR, "div.product_box_name h2 a").get_attribute("href")
-                except Exception:
-                    pass
-                if score > best_score and price and link:
-                    best_result = {"title": title, "price": price, "url": link}
-                    best_score = score
-                    if best_score >= 95:
-                        break
-            except Exception:
-                continue
+        best_result, miss = _search_page("pcgarage", url, driver, _CARD_SPEC, product_name, precise=True)
     except Exception:
         pass
 
@@ -133,4 +148,12 @@ def search_pcgarage(product_name: str, driver):
                 cache_upsert("pcgarage", best_result)
             except Exception:
                 pass
-    return best_result
+    elif miss and cache_upsert_negative is not None:
+        try:
+            cache_upsert_negative("pcgarage", product_name, miss)
+        except Exception:
+            pass
+    return _live_result(best_result)
+
+
+refresh_pcgarage = _make_refresher("pcgarage", _PRODUCT_SPEC)
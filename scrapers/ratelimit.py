@@ -0,0 +1,175 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+
+_log = logging.getLogger(__name__)
+
+RATE_STATE_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "ratelimit.json")
+
+
+@contextmanager
+def _locked_file(path: str):
+    """Open `path` for read/write under an exclusive advisory lock."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a+", encoding="utf-8") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield f
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class HostRateLimiter:
+    """Per-host token bucket whose rate adapts to how each shop responds.
+
+    Buckets are kept in GCRA form: per host a rate (requests/s) and a
+    "theoretical arrival time" (tat). A request may go at tat - tolerance,
+    where tolerance lets `burst` requests through back to back, and pushes
+    tat forward by 1/rate. Reservations are taken under a thread lock and,
+    when `state_file` is set, under an advisory lock on that file, so threads,
+    asyncio tasks and separate processes share one budget per host.
+
+    The rate follows AIMD: each healthy response adds `increase` req/s (up to
+    max_rate); a captcha / "too many requests" halves it (down to min_rate)
+    and imposes a cooldown; a response much slower than the host's usual
+    latency cuts it by 20%.
+    """
+
+    def __init__(
+        self,
+        *,
+        initial_rate: float = 1 / 3.5,
+        min_rate: float = 1 / 60,
+        max_rate: float = 1.0,
+        burst: int = 1,
+        increase: float = 0.02,
+        cooldown: float = 5.0,
+        jitter: float = 0.2,
+        state_file: Optional[str] = RATE_STATE_FILE,
+    ):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = max(1, burst)
+        self.increase = increase
+        self.cooldown = cooldown
+        self.jitter = jitter
+        self.state_file = state_file
+        self._lock = threading.Lock()
+        self._state: Dict[str, dict] = {}
+
+    # --- shared state ---
+    @contextmanager
+    def _hosts(self):
+        """Yield the mutable per-host state, persisted on exit when shared.
+
+        If the state file cannot be read or written the in-memory state is
+        used instead; rate limiting never fails because of the file.
+        """
+        with self._lock, ExitStack() as stack:
+            f = None
+            if self.state_file:
+                try:
+                    f = stack.enter_context(_locked_file(self.state_file))
+                    f.seek(0)
+                    data = f.read()
+                    # an empty or torn file (e.g. a failed write) keeps what this process knows
+                    if data:
+                        try:
+                            loaded = json.loads(data)
+                        except ValueError:
+                            loaded = None
+                        if isinstance(loaded, dict):
+                            self._state = loaded
+                except OSError as e:
+                    _log.warning("rate limit state not loaded from %s: %s", self.state_file, e)
+                    f = None
+            yield self._state
+            if f is not None:
+                try:
+                    f.seek(0)
+                    f.truncate()
+                    json.dump(self._state, f)
+                    f.flush()
+                except OSError as e:
+                    _log.warning("rate limit state not saved to %s: %s", self.state_file, e)
+
+    def _host(self, state: Dict[str, dict], host: str) -> dict:
+        rec = state.get(host)
+        if not isinstance(rec, dict):
+            rec = state[host] = {"rate": self.initial_rate, "tat": 0.0, "latency": None}
+        return rec
+
+    # --- acquiring ---
+    def reserve(self, host: str) -> float:
+        """Reserve the next slot for `host`; returns how long to wait for it."""
+        now = time.time()
+        with self._hosts() as state:
+            rec = self._host(state, host)
+            interval = 1.0 / rec["rate"]
+            tat = max(rec["tat"], now)
+            allowed_at = tat - (self.burst - 1) * interval
+            rec["tat"] = tat + interval
+        delay = max(0.0, allowed_at - now)
+        if delay > 0 and self.jitter:
+            delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        return delay
+
+    def acquire(self, host: str) -> None:
+        delay = self.reserve(host)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, host: str) -> None:
+        delay = await asyncio.to_thread(self.reserve, host)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    # --- feedback ---
+    def report(self, host: str, *, blocked: bool = False, latency: Optional[float] = None) -> None:
+        """Feed the outcome of a request back into the host's rate."""
+        with self._hosts() as state:
+            rec = self._host(state, host)
+            rate = rec["rate"]
+            baseline = rec.get("latency")
+            if blocked:
+                rate *= 0.5
+                rec["tat"] = max(rec["tat"], time.time() + self.cooldown)
+            elif latency is not None and baseline and latency > 2 * baseline:
+                rate *= 0.8
+            else:
+                rate += self.increase
+            rec["rate"] = min(self.max_rate, max(self.min_rate, rate))
+            if latency is not None and not blocked:
+                rec["latency"] = latency if baseline is None else 0.8 * baseline + 0.2 * latency
+
+    def rate(self, host: str) -> float:
+        with self._hosts() as state:
+            return self._host(state, host)["rate"]
+
+
+RATE_LIMITER = HostRateLimiter()
@@ -0,0 +1,214 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Set, Tuple
+
+from .utils import DriverPool, _build_driver, _product_page
+
+try:
+    from cache import _norm_query, is_expired, is_stale, item_age, upsert, upsert_for_query
+except Exception:
+    _norm_query = None
+    is_expired = None
+    is_stale = None
+    item_age = None
+    upsert = None
+    upsert_for_query = None
+
+
+class Refresher:
+    """Re-runs searches for stale cache hits in the background.
+
+    At most one refresh per (site, normalized query) is in flight. A job
+    leases a driver only when it needs one, so a site served over HTTP
+    refreshes without starting Chrome; drivers come from `pool` when set
+    (e.g. the one main.py searches with), else from a pool of `workers`
+    headless drivers kept by the refresher. The search writes the new price
+    to the cache; hits with a known URL are refreshed from the product page
+    instead (see _refresh_job). Call close() before exiting: the worker
+    threads are joined at interpreter exit.
+    """
+
+    def __init__(
+        self, workers: int = 2, *, driver_factory: Optional[Callable] = None, pool: Optional[DriverPool] = None
+    ):
+        self.workers = workers
+        self.driver_factory = driver_factory or (lambda: _build_driver(headless=True))
+        self.pool = pool
+        self._own_pool: Optional[DriverPool] = None
+        self._lock = threading.Lock()
+        self._inflight: Set[Tuple[str, str]] = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @staticmethod
+    def _key(site: str, query: str) -> Tuple[str, str]:
+        norm = _norm_query(query) if _norm_query is not None else " ".join((query or "").lower().split())
+        return site, norm
+
+    def refreshing(self, site: str, query: str) -> bool:
+        with self._lock:
+            return self._key(site, query) in self._inflight
+
+    def pending(self) -> int:
+        """Refreshes queued or running."""
+        with self._lock:
+            return len(self._inflight)
+
+    def _pool(self) -> DriverPool:
+        with self._lock:
+            if self.pool is not None:
+                return self.pool
+            if self._own_pool is None:
+                self._own_pool = DriverPool(size=self.workers, factory=self.driver_factory)
+            return self._own_pool
+
+    def submit(self, site: str, query: str, search: Callable) -> bool:
+        """Schedule search(query, driver, use_cache=False); returns True once a refresh is in flight."""
+        key = self._key(site, query)
+        with self._lock:
+            if key in self._inflight:
+                return True
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="refresh")
+            self._inflight.add(key)
+        try:
+            self._executor.submit(self._run, key, query, search)
+        except RuntimeError:  # interpreter shutting down
+            with self._lock:
+                self._inflight.discard(key)
+            return False
+        return True
+
+    def _run(self, key: Tuple[str, str], query: str, search: Callable) -> None:
+        pool = self._pool()
+        leased = []
+
+        def driver():
+            if not leased:
+                leased.append(pool.acquire())
+            return leased[0]
+
+        try:
+            search(query, driver, use_cache=False)
+        except Exception:
+            pass
+        finally:
+            if leased:
+                pool.release(leased[0])
+            with self._lock:
+                self._inflight.discard(key)
+
+    def close(self, wait: bool = True) -> None:
+        """Stop taking refreshes; with `wait`, let the queued ones finish first.
+
+        Drivers of the refresher's own pool are quit; a shared `pool` is left
+        to its owner.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
+            if not wait:
+                with self._lock:
+                    self._inflight.clear()  # cancelled jobs never reach their finally
+        with self._lock:
+            own, self._own_pool = self._own_pool, None
+        if own is not None:
+            own.close()
+
+
+REFRESHER = Refresher()
+
+
+def _refresh_job(site: str, item: dict, search: Callable) -> Callable:
+    """What a stale hit re-runs: the product page when its URL is known, else the search."""
+    url = item.get("url")
+    try:
+        from .orchestrator import REFRESHERS
+    except Exception:
+        return search
+    refresh = REFRESHERS.get(site)
+    if not url or refresh is None:
+        return search
+
+    def job(query, driver, use_cache=False):
+        # a page that no longer shows a price falls back to searching again
+        return refresh(url, driver, query=query) or search(query, driver, use_cache=use_cache)
+
+    return job
+
+
+def _serve_cached(site: str, query: str, item: dict, search: Callable, *, source: str = "cache") -> dict:
+    """Result for a cache or catalog hit, with freshness metadata; a stale hit is refreshed in the background."""
+    stale = is_stale(site, item)
+    if stale:
+        refreshing = REFRESHER.submit(site, query, _refresh_job(site, item, search))
+    else:
+        refreshing = REFRESHER.refreshing(site, query)
+    return {
+        "title": item.get("title"),
+        "price": item.get("price"),
+        "url": item.get("url"),
+        "specs": item.get("specs"),
+        "cached": True,
+        "age": item_age(item),
+        "stale": stale,
+        "refreshing": refreshing,
+        "source": source,
+    }
+
+
+def _serve_catalog(site: str, query: str, search: Callable, driver) -> Optional[dict]:
+    """_serve_cached for an offline catalog match (scrapers/catalog.py), or None without one.
+
+    A match whose dump is older than the site's max age is not shown with
+    its old price: the chosen URL is re-priced now from its product page,
+    and None (so the caller searches live) is returned if that fails.
+    """
+    try:
+        # imported here so `python -m scrapers.catalog` / `scrapers.snapshot` run without a double import
+        from .catalog import catalog_lookup
+        from .orchestrator import REFRESHERS
+    except Exception:
+        return None
+    hit = catalog_lookup(site, query)
+    if not hit:
+        return None
+    if is_expired is None or is_expired(site, hit):
+        refresh = REFRESHERS.get(site)
+        return refresh(hit["url"], driver, query=query) if refresh is not None else None
+    return _serve_cached(site, query, hit, search, source="catalog")
+
+
+def _live_result(result: Optional[dict]) -> Optional[dict]:
+    """Same freshness metadata as _serve_cached, for a result fetched just now."""
+    if not result:
+        return result
+    return {**result, "cached": False, "age": 0.0, "stale": False, "refreshing": False, "source": "live"}
+
+
+def _make_refresher(site: str, spec: dict) -> Callable:
+    """refresh_<site>(url, driver=None, *, query=None) for a site's product-page `spec`."""
+
+    def refresh(url: str, driver=None, *, query: Optional[str] = None) -> Optional[dict]:
+        """Current price of a known product URL, read from its page (no search).
+
+        The cached item for `url` is updated; with `query` the query is also
+        mapped to it. Returns None when the page yields no price.
+        """
+        result = None
+        try:
+            result = _product_page(site, url, driver, spec)
+        except Exception:
+            pass
+        if result:
+            try:
+                if query and upsert_for_query is not None:
+                    upsert_for_query(site, query, result)
+                elif upsert is not None:
+                    upsert(site, result)
+            except Exception:
+                pass
+        return _live_result(result)
+
+    refresh.__name__ = refresh.__qualname__ = f"refresh_{site}"
+    return refresh
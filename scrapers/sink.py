@@ -0,0 +1,218 @@
+import gzip
+import io
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+try:
+    import zstandard
+except Exception:
+    zstandard = None
+
+
+def _compression_for(path: str, compress: Optional[str]) -> Optional[str]:
+    if compress:
+        return compress
+    if path.endswith(".gz"):
+        return "gzip"
+    if path.endswith(".zst"):
+        return "zstd"
+    return None
+
+
+class JsonlSink:
+    """Append-only JSON Lines writer for crawler output.
+
+    Records are written compactly, one per line, as they arrive, so memory
+    does not grow with the crawl. The file is flushed every `flush_every`
+    records or `flush_interval` seconds, whichever comes first; a crash loses
+    at most that much. `compress` is None, "gzip" or "zstd" (guessed from a
+    .gz / .zst suffix when not given); compressed streams are sync-flushed so
+    everything before the last flush stays readable.
+
+    checkpoint() ends the current gzip member / zstd frame and returns the
+    file offset; reopening with resume_at=<offset> cuts off whatever was
+    written after that point and continues from there.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        compress: Optional[str] = None,
+        append: bool = False,
+        resume_at: Optional[int] = None,
+        flush_every: int = 500,
+        flush_interval: float = 2.0,
+    ):
+        self.path = path
+        self.compress = _compression_for(path, compress)
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.count = 0
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        if resume_at is not None and os.path.exists(path):
+            self._raw = open(path, "r+b")
+            self._raw.truncate(resume_at)
+            self._raw.seek(resume_at)
+        else:
+            self._raw = open(path, "ab" if append else "wb")
+        if self.compress == "gzip":
+            self._out = gzip.GzipFile(fileobj=self._raw, mode="ab")
+        elif self.compress == "zstd":
+            if zstandard is None:
+                self._raw.close()
+                raise RuntimeError("zstd output needs the 'zstandard' package")
+            self._out = zstandard.ZstdCompressor().stream_writer(self._raw, closefd=False)
+        elif self.compress is None:
+            self._out = self._raw
+        else:
+            self._raw.close()
+            raise ValueError(f"unknown compression: {self.compress!r}")
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self.write_many((record,))
+
+    def write_many(self, records: Iterable[Dict[str, Any]]) -> None:
+        data = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode("utf-8")
+        if not data:
+            return
+        with self._lock:
+            self._out.write(data)
+            n = data.count(b"\n")
+            self.count += n
+            self._unflushed += n
+            if self._unflushed >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def _flush(self) -> None:
+        if self.compress == "gzip":
+            self._out.flush(zlib.Z_SYNC_FLUSH)
+        elif self.compress == "zstd":
+            self._out.flush(zstandard.FLUSH_BLOCK)
+        self._raw.flush()
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush()
+
+    def checkpoint(self) -> int:
+        """Flush everything written so far as a complete gzip member / zstd frame; returns the file offset."""
+        with self._lock:
+            if self.compress == "gzip":
+                self._out.close()  # writes the member trailer, leaves the file open
+            elif self.compress == "zstd":
+                self._out.flush(zstandard.FLUSH_FRAME)
+            self._raw.flush()
+            offset = self._raw.tell()
+            if self.compress == "gzip":
+                # the next member's header goes after the offset, so resume_at drops it
+                self._out = gzip.GzipFile(fileobj=self._raw, mode="ab")
+            self._unflushed = 0
+            self._last_flush = time.monotonic()
+            return offset
+
+    def close(self) -> None:
+        with self._lock:
+            if self._out is None:
+                return
+            if self._out is not self._raw:
+                self._out.close()
+            self._raw.close()
+            self._out = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _open_text(path: str) -> io.TextIOBase:
+    compress = _compression_for(path, None)
+    if compress == "gzip":
+        return gzip.open(path, "rt", encoding="utf-8")
+    if compress == "zstd":
+        if zstandard is None:
+            raise RuntimeError("reading .zst needs the 'zstandard' package")
+        raw = open(path, "rb")
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+        return io.TextIOWrapper(reader, encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """Records of a JSON Lines file, plain or compressed.
+
+    A truncated tail (a crawl killed mid-write) ends the iteration instead
+    of raising, so partial output is still usable.
+    """
+    with _open_text(path) as f:
+        try:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    break
+        except (EOFError, zlib.error):
+            return
+        except Exception as e:
+            if zstandard is not None and isinstance(e, zstandard.ZstdError):
+                return
+            raise
+
+
+_ARRAY_SEP = re.compile(r"[\s,]*")
+
+
+def _iter_json_array(f: io.TextIOBase, chunk_size: int = 1 << 20) -> Iterator[Any]:
+    """Elements of a top-level JSON array, decoded one at a time from `chunk_size` reads.
+
+    Only the current chunk and element are held in memory, so a large
+    pretty-printed dump streams like a JSON Lines file.
+    """
+    decoder = json.JSONDecoder()
+    buf = f.read(chunk_size).lstrip()
+    if not buf.startswith("["):
+        raise ValueError("not a JSON array")
+    pos, eof = 1, False
+    while True:
+        pos = _ARRAY_SEP.match(buf, pos).end()
+        if pos < len(buf) and buf[pos] == "]":
+            return
+        try:
+            if pos == len(buf):
+                raise ValueError("need more input")
+            item, end = decoder.raw_decode(buf, pos)
+            if end == len(buf) and not eof:
+                raise ValueError("element may continue in the next chunk")
+        except ValueError:
+            if eof:
+                raise ValueError("truncated JSON array") from None
+            more = f.read(chunk_size)
+            buf, pos, eof = buf[pos:] + more, 0, not more
+            continue
+        pos = end
+        yield item
+
+
+def iter_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Records of a crawler dump: a JSON array (.json) or JSON Lines (anything else)."""
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            yield from _iter_json_array(f)
+        return
+    yield from iter_jsonl(path)
@@ -0,0 +1,214 @@
+"""Columnar price snapshots of crawler output.
+
+A snapshot is a directory of NumPy columns, one row per product:
+
+    prices.npy                      float32, NaN when the record had no (positive) price
+    category_ids.npy                int32 index into categories.json, -1 for none
+    title_bytes.npy, title_offsets.npy   UTF-8 blob + int64 offsets
+    url_bytes.npy, url_offsets.npy
+    categories.json                 interned category names
+
+Columns are opened with mmap_mode="r", so filtering by category or price
+range and picking the k cheapest touch only the price/category columns;
+titles and URLs are decoded for the rows actually returned.
+
+Usage:
+    python -m scrapers.snapshot convert <dump> <snapshot_dir>
+    python -m scrapers.snapshot cheapest <snapshot_dir> [-k N] [--category URL] [--min P] [--max P]
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .sink import iter_records
+
+_COLUMNS = ("prices", "category_ids", "title_bytes", "title_offsets", "url_bytes", "url_offsets")
+
+
+class SnapshotWriter:
+    """Builds a snapshot record by record; close() writes the directory atomically.
+
+    Rows are kept as compact arrays and byte blobs rather than dicts, so a
+    large dump converts in a fraction of the memory json.load would need.
+    Records without a title or URL are skipped, as are repeated URLs unless
+    `dedupe` is off.
+    """
+
+    def __init__(self, path: str, *, dedupe: bool = True):
+        self.path = path
+        self._titles = bytearray()
+        self._title_offsets = array("q", [0])
+        self._urls = bytearray()
+        self._url_offsets = array("q", [0])
+        self._prices = array("f")
+        self._category_ids = array("i")
+        self._categories: Dict[str, int] = {}
+        self._seen = set() if dedupe else None
+
+    def __len__(self) -> int:
+        return len(self._prices)
+
+    def add(self, record: Dict[str, Any]) -> int:
+        """Append one crawler record; returns its row, or -1 when it was skipped."""
+        title = (record.get("title") or "").strip()
+        url = (record.get("url") or "").strip()
+        if not title or not url:
+            return -1
+        if self._seen is not None:
+            if url in self._seen:
+                return -1
+            self._seen.add(url)
+        self._titles += title.encode("utf-8")
+        self._title_offsets.append(len(self._titles))
+        self._urls += url.encode("utf-8")
+        self._url_offsets.append(len(self._urls))
+        price = record.get("price")
+        self._prices.append(float(price) if isinstance(price, (int, float)) and price > 0 else float("nan"))
+        category = record.get("category")
+        if category:
+            cid = self._categories.setdefault(category, len(self._categories))
+        else:
+            cid = -1
+        self._category_ids.append(cid)
+        return len(self._prices) - 1
+
+    def close(self, extra: Optional[Dict[str, np.ndarray]] = None) -> int:
+        """Write the columns (plus any `extra` arrays) to `path`; returns the row count."""
+        columns = {
+            "prices": np.frombuffer(self._prices, dtype=np.float32),
+            "category_ids": np.frombuffer(self._category_ids, dtype=np.int32),
+            "title_bytes": np.frombuffer(bytes(self._titles), dtype=np.uint8),
+            "title_offsets": np.frombuffer(self._title_offsets, dtype=np.int64),
+            "url_bytes": np.frombuffer(bytes(self._urls), dtype=np.uint8),
+            "url_offsets": np.frombuffer(self._url_offsets, dtype=np.int64),
+            **(extra or {}),
+        }
+        tmp = self.path + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for name, arr in columns.items():
+            np.save(os.path.join(tmp, name + ".npy"), arr)
+        with open(os.path.join(tmp, "categories.json"), "w", encoding="utf-8") as f:
+            json.dump(list(self._categories), f, ensure_ascii=False)
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.replace(tmp, self.path)
+        return len(self)
+
+
+def write_snapshot(records: Iterable[Dict[str, Any]], path: str) -> int:
+    writer = SnapshotWriter(path)
+    for rec in records:
+        writer.add(rec)
+    return writer.close()
+
+
+def convert(src: str, dst: str) -> int:
+    """Snapshot of a crawler dump (.json array or JSON Lines, streamed)."""
+    return write_snapshot(iter_records(src), dst)
+
+
+class Snapshot:
+    """Read-only, memory-mapped view of a snapshot directory."""
+
+    def __init__(self, path: str, columns: Tuple[str, ...] = ()):
+        self.path = path
+        for name in _COLUMNS + tuple(columns):
+            setattr(self, name, np.load(os.path.join(path, name + ".npy"), mmap_mode="r"))
+        with open(os.path.join(path, "categories.json"), "r", encoding="utf-8") as f:
+            self.categories: List[str] = json.load(f)
+        self._category_index = {c: i for i, c in enumerate(self.categories)}
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    @staticmethod
+    def _str(blob: np.ndarray, offsets: np.ndarray, i: int) -> str:
+        return blob[offsets[i]:offsets[i + 1]].tobytes().decode("utf-8")
+
+    def title(self, row: int) -> str:
+        return self._str(self.title_bytes, self.title_offsets, row)
+
+    def url(self, row: int) -> str:
+        return self._str(self.url_bytes, self.url_offsets, row)
+
+    def category(self, row: int) -> Optional[str]:
+        cid = int(self.category_ids[row])
+        return self.categories[cid] if cid >= 0 else None
+
+    def record(self, row: int) -> Dict[str, Any]:
+        price = float(self.prices[row])
+        return {
+            "title": self.title(row),
+            "price": None if np.isnan(price) else price,
+            "url": self.url(row),
+            "category": self.category(row),
+        }
+
+    def select(
+        self,
+        *,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+    ) -> np.ndarray:
+        """Rows matching all given filters; a price bound also drops rows without a price."""
+        mask = np.ones(len(self), dtype=bool)
+        if category is not None:
+            cid = self._category_index.get(category)
+            if cid is None:
+                return np.empty(0, dtype=np.int64)
+            mask &= self.category_ids == cid
+        if min_price is not None:
+            mask &= self.prices >= min_price
+        if max_price is not None:
+            mask &= self.prices <= max_price
+        return np.flatnonzero(mask)
+
+    def cheapest(self, k: int = 10, **filters) -> List[Dict[str, Any]]:
+        """The k lowest-priced records matching `filters` (see select), cheapest first."""
+        if k <= 0:
+            return []
+        rows = self.select(**filters)
+        prices = np.asarray(self.prices[rows])
+        priced = ~np.isnan(prices)
+        rows, prices = rows[priced], prices[priced]
+        if len(rows) > k:
+            top = np.argpartition(prices, k - 1)[:k]
+            rows, prices = rows[top], prices[top]
+        return [self.record(int(r)) for r in rows[np.argsort(prices, kind="stable")]]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Columnar price snapshots of crawler dumps")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    conv = sub.add_parser("convert", help="convert a .json / .jsonl dump")
+    conv.add_argument("src")
+    conv.add_argument("dst")
+    top = sub.add_parser("cheapest", help="k cheapest products, optionally filtered")
+    top.add_argument("snapshot")
+    top.add_argument("-k", type=int, default=10)
+    top.add_argument("--category", default=None)
+    top.add_argument("--min", type=float, default=None, dest="min_price")
+    top.add_argument("--max", type=float, default=None, dest="max_price")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.cmd == "convert":
+        count = convert(args.src, args.dst)
+        print(f"{count} products -> {args.dst} in {time.perf_counter() - start:.1f}s")
+        return
+    snap = Snapshot(args.snapshot)
+    rows = snap.cheapest(args.k, category=args.category, min_price=args.min_price, max_price=args.max_price)
+    for rec in rows:
+        print(f"{rec['price']:>10.2f} Lei  {rec['title']}\n            {rec['url']}")
+    print(f"({len(rows)} of {len(snap)} products, {(time.perf_counter() - start) * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,46 @@
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
-from rapidfuzz import fuzz
-from urllib.parse import urlparse
-import os, random, time, re
-from typing import Dict
+from .ratelimit import RATE_LIMITER
+from rapidfuzz import fuzz, process
+from bs4 import BeautifulSoup
+import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urljoin, urlparse
+import numpy as np
+import os, random, time, re, json, threading, subprocess, sys
+import importlib.util
+from functools import lru_cache
+from contextlib import contextmanager
+from collections import deque
+from typing import Callable, Dict, Optional, Sequence, Union
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except Exception:
+    LexborHTMLParser = None
+try:
+    import httpx
+except Exception:
+    httpx = None
+try:
+    import psutil
+except Exception:
+    psutil = None
+# h2 enables HTTP/2 in httpx; brotli lets httpx/urllib3 decode "br" responses
+_HAS_H2 = importlib.util.find_spec("h2") is not None
+_HAS_BROTLI = importlib.util.find_spec("brotli") is not None
 
 
 # --- Similarity helpers ---
+_WORD_SPLIT_RE = re.compile(r"[^\w]+")
+_DIGITS_RE = re.compile(r"\d+")
+_STOPWORDS = frozenset({"si", "sau", "de", "la", "cu", "in", "pe", "pentru", "the", "and", "with"})
+
+
 def _match_score(title: str, query: str) -> float:
     t = (title or "").lower()
     q = (query or "").lower()
@@ -22,9 +51,8 @@ def _match_score(title: str, query: str) -> float:
 
 
 def _tokenize_words(s: str) -> list[str]:
-    tokens = re.split(r"[^\w]+", (s or "").lower())
-    stop = {"si", "sau", "de", "la", "cu", "in", "pe", "pentru", "the", "and", "with"}
-    return [t for t in tokens if t and t not in stop]
+    tokens = _WORD_SPLIT_RE.split((s or "").lower())
+    return [t for t in tokens if t and t not in _STOPWORDS]
 
 
 def _token_coverage(title: str, query: str) -> float:
@@ -37,8 +65,12 @@ def _token_coverage(title: str, query: str) -> float:
 
 
 def _numeric_mismatch_penalty(title: str, query: str) -> int:
-    q_nums = set(re.findall(r"\d+", query or ""))
-    t_nums = set(re.findall(r"\d+", title or ""))
+    return _numeric_penalty_sets(
+        set(_DIGITS_RE.findall(title or "")), set(_DIGITS_RE.findall(query or ""))
+    )
+
+
+def _numeric_penalty_sets(t_nums: set, q_nums: set) -> int:
     penalty = 0
     if q_nums and not q_nums.issubset(t_nums):
         penalty += 25
@@ -53,17 +85,243 @@ def _numeric_mismatch_penalty(title: str, query: str) -> int:
     return penalty
 
 
-def _precise_match_score(title: str, query: str) -> float:
-    base = _match_score(title, query)
-    cov = _token_coverage(title, query)
-    pen = _numeric_mismatch_penalty(title, query)
-    score = base * (0.5 + 0.5 * cov) - pen
+class PreparedTitle:
+    """Lower-cased title with its word set and numbers, computed once."""
+
+    __slots__ = ("text", "lowered", "token_set", "nums")
+
+    def __init__(self, title: str):
+        self.text = title or ""
+        self.lowered = self.text.lower()
+        self.token_set = frozenset(_tokenize_words(self.lowered))
+        self.nums = frozenset(_DIGITS_RE.findall(self.text))
+
+
+class PreparedQuery:
+    """Query features reused for every candidate title of a search.
+
+    `lowered` is also the form rapidfuzz consumes: the scorers run with
+    processor=None on lower-cased strings, so no further processing is kept.
+    """
+
+    __slots__ = ("text", "lowered", "tokens", "token_set", "nums")
+
+    def __init__(self, query: str):
+        self.text = query or ""
+        self.lowered = self.text.lower()
+        self.tokens = tuple(_tokenize_words(self.lowered))
+        self.token_set = frozenset(self.tokens)
+        self.nums = frozenset(_DIGITS_RE.findall(self.text))
+
+    def coverage(self, title: PreparedTitle) -> float:
+        if not self.tokens:
+            return 0.0
+        return sum(1 for w in self.tokens if w in title.token_set) / len(self.tokens)
+
+    def penalty(self, title: PreparedTitle) -> int:
+        return _numeric_penalty_sets(title.nums, self.nums)
+
+
+@lru_cache(maxsize=65536)
+def _prepare_title(title: str) -> PreparedTitle:
+    # titles recur across searches (cached items, crawler dumps); keep them warm
+    return PreparedTitle(title)
+
+
+@lru_cache(maxsize=256)
+def _prepare_query(query: str) -> PreparedQuery:
+    return PreparedQuery(query)
+
+
+def _precise_match_score(
+    title: Union[str, PreparedTitle], query: Union[str, PreparedQuery]
+) -> float:
+    t = title if isinstance(title, PreparedTitle) else _prepare_title(title or "")
+    q = query if isinstance(query, PreparedQuery) else _prepare_query(query or "")
+    base = max(
+        fuzz.token_set_ratio(q.lowered, t.lowered),
+        fuzz.partial_ratio(q.lowered, t.lowered),
+    )
+    score = base * (0.5 + 0.5 * q.coverage(t)) - q.penalty(t)
     return score
 
 
+def _score_matrix(
+    titles: Sequence[str],
+    queries: Sequence[Union[str, PreparedQuery]],
+    *,
+    precise: bool = False,
+    workers: int = -1,
+) -> np.ndarray:
+    """Score every title against every query in one call.
+
+    Returns an array of shape (len(queries), len(titles)) where
+    scores[i, j] == _match_score(titles[j], queries[i]), or
+    _precise_match_score when `precise` is set. The fuzzy part runs in
+    rapidfuzz's C++ cdist across `workers` threads; token coverage and the
+    numeric penalty are computed once per title/query with set operations.
+    """
+    pq = [q if isinstance(q, PreparedQuery) else _prepare_query(q or "") for q in queries]
+    pt = [_prepare_title(t or "") for t in titles]
+    lt = [t.lowered for t in pt]
+    lq = [q.lowered for q in pq]
+    if not lt or not lq:
+        return np.zeros((len(lq), len(lt)))
+    base = np.maximum(
+        process.cdist(lq, lt, scorer=fuzz.token_set_ratio, dtype=np.float64, workers=workers),
+        process.cdist(lq, lt, scorer=fuzz.partial_ratio, dtype=np.float64, workers=workers),
+    )
+    if not precise:
+        return base
+
+    cov = np.array([[q.coverage(t) for t in pt] for q in pq], dtype=np.float64)
+    pen = np.array([[q.penalty(t) for t in pt] for q in pq], dtype=np.float64)
+    return base * (0.5 + 0.5 * cov) - pen
+
+
+def _score_titles(
+    titles: Sequence[str], query: Union[str, PreparedQuery], *, precise: bool = False
+) -> np.ndarray:
+    """Scores of `titles` against a single query (one row of _score_matrix)."""
+    return _score_matrix(titles, [query], precise=precise)[0]
+
+
+# --- Startup timings ---
+# First observed duration of each cold-start stage, for startup_report().
+STARTUP_TIMINGS: Dict[str, float] = {}
+_timings_lock = threading.Lock()
+
+
+def _record_timing(stage: str, seconds: float) -> None:
+    with _timings_lock:
+        STARTUP_TIMINGS.setdefault(stage, seconds)
+
+
+def startup_report() -> str:
+    """One line per cold-start stage: imports, driver resolution, browser launch, first navigation."""
+    stages = ["imports", "driver_resolution", "browser_launch", "first_navigation"]
+    lines = []
+    for stage in stages + [k for k in STARTUP_TIMINGS if k not in stages]:
+        if stage in STARTUP_TIMINGS:
+            lines.append(f"{stage:<18} {STARTUP_TIMINGS[stage] * 1000:8.0f} ms")
+    return "\n".join(lines)
+
+
+# --- Chromedriver resolution ---
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+CHROMEDRIVER_CACHE_FILE = os.path.join(DATA_DIR, "chromedriver.json")
+_chromedriver_lock = threading.Lock()
+
+
+def _chrome_version() -> Optional[str]:
+    """Installed Chrome version, read without starting the browser."""
+    if sys.platform.startswith("win"):
+        try:
+            import winreg
+
+            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Software\Google\Chrome\BLBeacon") as key:
+                return winreg.QueryValueEx(key, "version")[0]
+        except Exception:
+            return None
+    if sys.platform == "darwin":
+        candidates = ["/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"]
+    else:
+        candidates = ["google-chrome", "google-chrome-stable", "chromium", "chromium-browser"]
+    for exe in candidates:
+        try:
+            out = subprocess.run([exe, "--version"], capture_output=True, text=True, timeout=5).stdout
+        except Exception:
+            continue
+        m = re.search(r"\d+\.\d+\.\d+\.\d+", out or "")
+        if m:
+            return m.group(0)
+    return None
+
+
+def _load_chromedriver_cache() -> Dict[str, str]:
+    try:
+        with open(CHROMEDRIVER_CACHE_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+
+def _save_chromedriver_cache(cache: Dict[str, str]) -> None:
+    try:
+        os.makedirs(DATA_DIR, exist_ok=True)
+        tmp = f"{CHROMEDRIVER_CACHE_FILE}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=2)
+        os.replace(tmp, CHROMEDRIVER_CACHE_FILE)
+    except Exception:
+        pass
+
+
+def _resolve_chromedriver(*, refresh: bool = False) -> tuple[str, bool]:
+    """(path, cached): a chromedriver matching the installed Chrome, and whether it came from the cache.
+
+    The path from ChromeDriverManager().install() is cached per Chrome version
+    in CHROMEDRIVER_CACHE_FILE, so later starts skip its version probing and
+    network checks. When install() fails (e.g. offline) the most recently
+    cached driver is used. `refresh` skips the cache and always resolves anew.
+    CHROMEDRIVER_PATH overrides everything.
+    """
+    override = os.environ.get("CHROMEDRIVER_PATH")
+    if override:
+        return override, False
+    with _chromedriver_lock:
+        version = _chrome_version()
+        cache = _load_chromedriver_cache()
+        path = cache.get(version) if version else cache.get("_last")
+        if path and os.path.exists(path) and not refresh:
+            return path, True
+        try:
+            path = ChromeDriverManager().install()
+        except Exception:
+            last = cache.get("_last")
+            if last and os.path.exists(last) and not refresh:
+                return last, True
+            raise
+        if version:
+            cache[version] = path
+        cache["_last"] = path
+        _save_chromedriver_cache(cache)
+        return path, False
+
+
+def _forget_chromedriver(path: str) -> None:
+    """Drop every cache entry pointing at `path`, e.g. after Chrome updated past it."""
+    with _chromedriver_lock:
+        cache = _load_chromedriver_cache()
+        kept = {k: v for k, v in cache.items() if v != path}
+        if kept != cache:
+            _save_chromedriver_cache(kept)
+
+
 # --- WebDriver builder ---
-def _build_driver() -> webdriver.Chrome:
+_USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+]
+
+
+# "eager" returns from driver.get at DOMContentLoaded; _wait_ready then waits
+# for the page's own readiness signal instead of every image and tracker.
+PAGE_LOAD_STRATEGY = os.environ.get("SCRAPER_PAGE_LOAD", "eager")
+# Seconds a navigation may take; also how long _throttled_get keeps waiting for
+# cards after the network looked idle.
+PAGE_LOAD_TIMEOUT = 20
+
+
+def _build_driver(
+    *, headless: bool = False, page_load_timeout: float = PAGE_LOAD_TIMEOUT, page_load_strategy: str = PAGE_LOAD_STRATEGY
+) -> webdriver.Chrome:
     chrome_options = Options()
+    chrome_options.page_load_strategy = page_load_strategy
+    if headless:
+        chrome_options.add_argument("--headless=new")
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
     chrome_options.add_argument("--log-level=3")
@@ -73,12 +331,7 @@ def _build_driver() -> webdriver.Chrome:
     )
     chrome_options.add_experimental_option("useAutomationExtension", False)
 
-    user_agents = [
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-    ]
-    chrome_options.add_argument(f"--user-agent={random.choice(user_agents)}")
+    chrome_options.add_argument(f"--user-agent={random.choice(_USER_AGENTS)}")
 
     prefs = {"profile.default_content_setting_values": {"images": 2}}
     chrome_options.add_experimental_option("prefs", prefs)
@@ -87,10 +340,23 @@ def _build_driver() -> webdriver.Chrome:
     if proxy:
         chrome_options.add_argument(f"--proxy-server={proxy}")
 
-    driver = webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()), options=chrome_options
-    )
-    driver.set_page_load_timeout(20)
+    start = time.perf_counter()
+    path, cached = _resolve_chromedriver()
+    _record_timing("driver_resolution", time.perf_counter() - start)
+    start = time.perf_counter()
+    try:
+        driver = webdriver.Chrome(service=Service(path), options=chrome_options)
+    except WebDriverException:
+        if not cached:
+            raise
+        # a cached driver stops matching once Chrome auto-updates (and without a
+        # detectable Chrome version "_last" is reused): resolve anew and retry once
+        _forget_chromedriver(path)
+        path, _ = _resolve_chromedriver(refresh=True)
+        driver = webdriver.Chrome(service=Service(path), options=chrome_options)
+    _record_timing("browser_launch", time.perf_counter() - start)
+    driver.set_page_load_timeout(page_load_timeout)
+    driver.page_load_timeout = page_load_timeout
     try:
         driver.execute_cdp_cmd(
             "Network.setBlockedURLs",
@@ -108,37 +374,790 @@ def _build_driver() -> webdriver.Chrome:
     return driver
 
 
+# --- Page-load accounting ---
+_loads = threading.local()
+
+
+def _page_loads() -> int:
+    """Pages loaded so far on this thread, over HTTP or in a browser (retries included).
+
+    Callers that budget page loads (scrapers/watch.py) read it before and
+    after a search, which runs all its requests on the calling thread.
+    """
+    return getattr(_loads, "count", 0)
+
+
+def _count_load() -> None:
+    _loads.count = _page_loads() + 1
+
+
+# --- Driver pool ---
+def _count_page(driver) -> None:
+    """Page-load counter read by DriverPool to recycle long-lived drivers."""
+    _count_load()
+    try:
+        driver.pages_loaded = getattr(driver, "pages_loaded", 0) + 1
+    except Exception:
+        pass
+
+
+def _driver_rss_mb(driver) -> Optional[float]:
+    """Resident memory of chromedriver and its Chrome processes, if psutil is available."""
+    if psutil is None:
+        return None
+    try:
+        proc = psutil.Process(driver.service.process.pid)
+        procs = [proc] + proc.children(recursive=True)
+        return sum(p.memory_info().rss for p in procs) / (1024 * 1024)
+    except Exception:
+        return None
+
+
+def _quit_driver(driver) -> None:
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+class DriverPool:
+    """A bounded pool of warm, reusable Chrome drivers.
+
+    Usage:
+        pool = DriverPool(size=2, prewarm=1)
+        with pool.lease() as driver:
+            ...
+        pool.close()
+
+    Drivers are health-checked when leased. Cookies and the current page are
+    reset when returned. A driver is replaced after `max_pages` page loads (as
+    counted by _throttled_get and safe_get) or once its processes use more
+    than `max_rss_mb` (needs psutil).
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        *,
+        factory: Callable[[], webdriver.Chrome] = _build_driver,
+        prewarm: int = 0,
+        max_pages: int = 200,
+        max_rss_mb: Optional[float] = 1500,
+    ):
+        self.size = max(1, size)
+        self.factory = factory
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        # guards _idle, _count and _closed; notified whenever a driver or a slot frees up
+        self._cond = threading.Condition()
+        self._idle: deque = deque()
+        self._count = 0
+        self._closed = False
+        for _ in range(min(prewarm, self.size)):
+            self._count += 1
+            threading.Thread(target=self._warm_one, daemon=True).start()
+
+    def _warm_one(self) -> None:
+        try:
+            driver = self.factory()
+        except Exception:
+            self._free_slot()  # a waiter can build instead
+            return
+        with self._cond:
+            if not self._closed:
+                self._idle.append(driver)
+                self._cond.notify()
+                return
+            self._count -= 1
+        _quit_driver(driver)
+
+    def _free_slot(self) -> None:
+        with self._cond:
+            self._count -= 1
+            self._cond.notify()
+
+    def _healthy(self, driver) -> bool:
+        if driver is None:
+            return False
+        if getattr(driver, "pages_loaded", 0) >= self.max_pages:
+            return False
+        if self.max_rss_mb is not None:
+            rss = _driver_rss_mb(driver)
+            if rss is not None and rss > self.max_rss_mb:
+                return False
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def _reset(self, driver) -> None:
+        try:
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        except Exception:
+            try:
+                driver.delete_all_cookies()
+            except Exception:
+                pass
+        try:
+            driver.get("about:blank")
+        except Exception:
+            pass
+
+    def acquire(
+        self, timeout: Optional[float] = None, *, cancel: Optional[threading.Event] = None
+    ) -> webdriver.Chrome:
+        """Lease a driver, building one while under `size`, else waiting for a release.
+
+        Raises TimeoutError after `timeout` seconds, and RuntimeError once the
+        pool is closed or `cancel` is set (see wake()).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("DriverPool is closed")
+                    if cancel is not None and cancel.is_set():
+                        raise RuntimeError("driver request cancelled")
+                    if self._idle:
+                        driver = self._idle.popleft()
+                        break
+                    if self._count < self.size:
+                        self._count += 1
+                        driver = None
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("no driver available")
+                    self._cond.wait(remaining)
+            if driver is None:
+                try:
+                    return self.factory()
+                except Exception:
+                    self._free_slot()
+                    raise
+            if self._healthy(driver):
+                return driver
+            _quit_driver(driver)
+            self._free_slot()
+
+    def wake(self) -> None:
+        """Wake every thread blocked in acquire() so it re-checks its `cancel` event."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def release(self, driver, *, broken: bool = False) -> None:
+        if not broken and not self._closed:
+            self._reset(driver)
+            with self._cond:
+                if not self._closed:
+                    self._idle.append(driver)
+                    self._cond.notify()
+                    return
+        _quit_driver(driver)
+        self._free_slot()
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None):
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        except BaseException:
+            # the page may be half-loaded or the session dead: do not reuse
+            self.release(driver, broken=True)
+            raise
+        self.release(driver)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._count -= len(idle)
+            self._cond.notify_all()  # blocked acquire() calls raise
+        for driver in idle:
+            _quit_driver(driver)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
 # --- Throttling & retries ---
-_last_hit_per_host: Dict[str, float] = {}
-_MIN_DELAY_RANGE = (2.0, 5.0)
+# Per-host adaptive token buckets, shared across threads and processes (see ratelimit.py).
+_BLOCK_MARKERS = (
+    "captcha",
+    "too many requests",
+    "temporarily unavailable",
+    "high traffic",
+    "are you a human",
+)
 
 
-def _throttled_get(driver: webdriver.Chrome, url: str, *, max_retries: int = 2):
+_SCRIPT_RE = re.compile(r"<script\b.*?</script>", re.S | re.I)
+
+
+def _looks_blocked(html: str) -> bool:
+    # ignore script bodies: most shops embed reCAPTCHA on every page
+    lowered = _SCRIPT_RE.sub("", html or "").lower()
+    return any(x in lowered for x in _BLOCK_MARKERS)
+
+
+# --- Readiness ---
+# Polled in the page. Ready when `sel` matches, or once the document has
+# loaded and no resource finished for idleMs (network idle, read from the
+# Resource Timing buffer). Without `sel`, DOMContentLoaded is enough; with a
+# null idleMs only the selector counts.
+_READY_JS = """
+const [sel, idleMs] = arguments;
+if (window.__scraperStale) return null;
+if (!sel) return document.readyState !== "loading" ? "dom" : null;
+if (document.querySelector(sel)) return "selector";
+if (idleMs == null || document.readyState !== "complete") return null;
+const nav = performance.getEntriesByType("navigation")[0];
+const ends = performance.getEntriesByType("resource").map((e) => e.responseEnd);
+const last = Math.max(nav ? nav.loadEventEnd : 0, ...ends);
+return performance.now() - last >= idleMs ? "idle" : null;
+"""
+
+
+def _navigate(driver: webdriver.Chrome, url: str) -> None:
+    """driver.get that leaves the old document marked for _wait_ready.
+
+    With the "none" page-load strategy get returns before the new document
+    exists, and the previous page must not satisfy the readiness check.
+    """
+    if (getattr(driver, "capabilities", None) or {}).get("pageLoadStrategy") == "none":
+        try:
+            driver.execute_script("window.__scraperStale = true;")
+        except Exception:
+            pass
+    driver.get(url)
+    _count_page(driver)
+
+
+def _wait_ready(
+    driver: webdriver.Chrome, ready: Optional[str] = None, *, timeout: float = 8, idle_ms: Optional[int] = 500
+) -> Optional[str]:
+    """Wait until the current page is ready; returns "selector", "idle", "dom", or None on timeout.
+
+    With `idle_ms` None a page that went quiet is not ready until `ready` matches.
+    """
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+            lambda d: d.execute_script(_READY_JS, ready, idle_ms)
+        )
+    except Exception:
+        return None
+
+
+def _settle_idle(driver, ready: Optional[str], state: Optional[str], elapsed: float) -> Optional[str]:
+    """`state` from _wait_ready, made "selector" if `ready` still matches in time.
+
+    Resource Timing lists finished requests only, so a slow XHR still loading
+    the cards looks idle: an "idle" page gets the rest of the driver's
+    page-load timeout (`elapsed` seconds are already spent) for `ready` to match.
+    """
+    if state != "idle" or not ready:
+        return state
+    remaining = getattr(driver, "page_load_timeout", PAGE_LOAD_TIMEOUT) - elapsed
+    if remaining > 0 and _wait_ready(driver, ready, timeout=remaining, idle_ms=None):
+        return "selector"
+    return state
+
+
+def _throttled_get(
+    driver: webdriver.Chrome, url: str, *, ready: Optional[str] = None, timeout: float = 8, max_retries: int = 2
+):
+    """Navigate to `url` and return the page source once `ready` (a CSS selector) matches."""
     host = urlparse(url).netloc
-    now = time.time()
-    last = _last_hit_per_host.get(host, 0)
-    min_delay = random.uniform(*_MIN_DELAY_RANGE)
-    to_wait = max(0.0, last + min_delay - now)
-    if to_wait > 0:
-        time.sleep(to_wait)
 
     for attempt in range(max_retries + 1):
-        driver.get(url)
-        time.sleep(random.uniform(0.5, 1.2))
-        html = (driver.page_source or "").lower()
-        if any(
-            x in html
-            for x in [
-                "captcha",
-                "too many requests",
-                "temporarily unavailable",
-                "high traffic",
-                "are you a human",
-            ]
-        ):
-            if attempt < max_retries:
-                time.sleep(2.5 * (attempt + 1) + random.random())
-                continue
+        RATE_LIMITER.acquire(host)
+        start = time.perf_counter()
+        _navigate(driver, url)
+        state = _wait_ready(driver, ready, timeout=timeout)
+        elapsed = time.perf_counter() - start
+        _record_timing("first_navigation", elapsed)
+        state = _settle_idle(driver, ready, state, elapsed)
+        # read by _search_page: None means the page never became ready, "idle"
+        # that it settled without the selector ever matching
+        driver.last_ready = state
+        html = driver.page_source or ""
+        blocked = _looks_blocked(html)
+        # a blocked host gets a lower rate and a cooldown before the retry's slot
+        RATE_LIMITER.report(host, blocked=blocked, latency=elapsed)
+        if blocked and attempt < max_retries:
+            continue
         break
 
-    _last_hit_per_host[host] = time.time()
+    return html
+
+
+# --- DOM extraction ---
+# "html" parses the page_source snapshot in-process; "dom" queries the live page.
+PARSE_MODE = os.environ.get("SCRAPER_PARSE_MODE", "html")
+# Runs in the page: one WebDriver round-trip returns every card's fields.
+_EXTRACT_CARDS_JS = """
+const [cardSel, fields] = arguments;
+return Array.from(document.querySelectorAll(cardSel)).map((card) => {
+  const out = {};
+  for (const [name, [sel, attr]] of Object.entries(fields)) {
+    const el = card.querySelector(sel);
+    if (!el) { out[name] = null; continue; }
+    out[name] = attr === "text" ? (el.innerText || "").trim() : (el[attr] || el.getAttribute(attr));
+  }
+  return out;
+});
+"""
+
+
+def _extract_cards(driver: webdriver.Chrome, spec: dict) -> list[dict]:
+    """Extract product cards described by a declarative spec in one call.
+
+    spec = {"card": css, "fields": {name: (css, "text" | attribute)}}; each
+    card becomes {name: value or None}. Attributes are read as DOM properties
+    first, so "href" comes back absolute, like WebElement.get_attribute.
+    """
+    try:
+        cards = driver.execute_script(_EXTRACT_CARDS_JS, spec["card"], spec["fields"])
+    except Exception:
+        return []
+    return [c for c in (cards or []) if isinstance(c, dict)]
+
+
+_PRICE_UNITS = ("Lei", "lei", "RON")
+
+
+def _parse_price(text: str, *, thousands_sep: str = "") -> float | None:
+    """Parse a listing price such as "129,99 lei" into a float.
+
+    Sites that print thousands separators ("1.299,99 lei") pass thousands_sep.
+    """
+    if not text:
+        return None
+    t = text.replace("\u00a0", "")
+    for unit in _PRICE_UNITS:
+        t = t.replace(unit, "")
+    if thousands_sep:
+        t = t.replace(thousands_sep, "")
+    try:
+        return float(t.replace(",", ".").strip())
+    except ValueError:
+        return None
+
+
+def _best_card(
+    cards: list[dict], query: str, *, precise: bool = False, thousands_sep: str = "", min_score: float = 60
+) -> dict | None:
+    """Pick the best-scoring card that has a price and a link.
+
+    Cards are {"title", "price_text", "href"} dicts as returned by
+    _extract_cards; the whole page is scored in one _score_titles call.
+    """
+    cards = [c for c in cards if c.get("title")]
+    if not cards:
+        return None
+    scores = _score_titles([c["title"].strip() for c in cards], query, precise=precise)
+    # best score first: the first card with a price and a link wins
+    for idx in np.argsort(-scores, kind="stable"):
+        if scores[idx] < min_score:
+            break
+        card = cards[idx]
+        price = _parse_price(card.get("price_text"), thousands_sep=thousands_sep)
+        link = card.get("href")
+        if price and link:
+            return {"title": card["title"].strip(), "price": price, "url": link}
+    return None
+
+
+# --- HTML snapshot parsing ---
+# selectolax (lexbor) when installed, BeautifulSoup + lxml otherwise. These
+# helpers are pure functions of the HTML, so they can run on a worker thread
+# while the browser is already loading the next page.
+def _html_root(html: str):
+    if LexborHTMLParser is not None:
+        return LexborHTMLParser(html)
+    return BeautifulSoup(html, "lxml")
+
+
+def _select(node, css: str) -> list:
+    return node.css(css) if LexborHTMLParser is not None else node.select(css)
+
+
+def _select_one(node, css: str):
+    return node.css_first(css) if LexborHTMLParser is not None else node.select_one(css)
+
+
+def _node_text(node, sep: str = "") -> str:
+    """Whitespace-normalised text, close to what innerText returns."""
+    if node is None:
+        return ""
+    raw = node.text(separator=sep) if LexborHTMLParser is not None else node.get_text(sep)
+    if sep == "\n":
+        return "\n".join(" ".join(line.split()) for line in raw.splitlines() if line.strip())
+    return " ".join(raw.split())
+
+
+def _node_attr(node, name: str):
+    if node is None:
+        return None
+    return node.attributes.get(name) if LexborHTMLParser is not None else node.get(name)
+
+
+def _parse_cards(html: str, spec: dict, base_url: str) -> list[dict]:
+    """Same output as _extract_cards, computed from an HTML snapshot."""
+    cards = []
+    for card in _select(_html_root(html), spec["card"]):
+        out = {}
+        for name, (css, attr) in spec["fields"].items():
+            el = _select_one(card, css)
+            if el is None:
+                out[name] = None
+            elif attr == "text":
+                out[name] = _node_text(el)
+            else:
+                value = _node_attr(el, attr)
+                out[name] = urljoin(base_url, value) if value and attr == "href" else value
+        cards.append(out)
+    return cards
+
+
+def _page_cards(driver: webdriver.Chrome, spec: dict, html: str | None = None, *, timeout: float = 5) -> list[dict]:
+    """Product cards of the page the driver is on.
+
+    `html` is the snapshot _throttled_get took once the cards (or network
+    idle) were there; without it the page is waited on here first. In "html"
+    mode the snapshot is parsed, in "dom" mode cards come from _extract_cards.
+    """
+    if html is None:
+        _wait_ready(driver, spec["card"], timeout=timeout)
+        html = driver.page_source
+    if PARSE_MODE == "html":
+        return _parse_cards(html, spec, driver.current_url)
+    return _extract_cards(driver, spec)
+
+
+# --- HTTP-first fetching ---
+# Served to plain HTTP clients that did not run the page's JavaScript.
+_SHELL_MARKERS = (
+    "just a moment...",
+    "cf-browser-verification",
+    "challenge-platform",
+    "enable javascript",
+    "activeaza javascript",
+)
+FETCH_MODES_FILE = os.path.join(DATA_DIR, "fetch_modes.json")
+# A site recorded as browser-only is probed over HTTP again after this long.
+FETCH_MODE_TTL = 24 * 3600
+
+
+class Fetcher:
+    """Fetch pages over a pooled HTTP client, escalating to Selenium when needed.
+
+    A page is escalated when the HTTP request fails or parses to nothing
+    while looking like a challenge or JavaScript shell (or while the site has
+    not yet been seen working over HTTP). When the browser then finds what
+    HTTP could not, the site is recorded as "browser" (persisted in
+    FETCH_MODES_FILE) and later fetches go straight to the driver until
+    FETCH_MODE_TTL expires. Sites where HTTP works are recorded as "http",
+    and an empty but ordinary HTTP page from them is trusted as empty.
+
+    Modes are kept per site and page `kind` ("search", "product"): a product
+    page that only parses in the browser does not move the site's searches
+    to Selenium, nor the other way round.
+    """
+
+    def __init__(self, *, timeout: float = 10, modes_file: Optional[str] = FETCH_MODES_FILE):
+        self.timeout = timeout
+        self.modes_file = modes_file
+        self._lock = threading.Lock()
+        self._client = None
+        self._modes: Dict[str, dict] = self._load_modes()
+
+    # --- per-site decisions ---
+    def _load_modes(self) -> Dict[str, dict]:
+        try:
+            with open(self.modes_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except Exception:
+            return {}
+
+    def _save_modes(self) -> None:
+        if not self.modes_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.modes_file), exist_ok=True)
+            tmp = f"{self.modes_file}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._modes, f, indent=2)
+            os.replace(tmp, self.modes_file)
+        except Exception:
+            pass
+
+    @staticmethod
+    def _key(site: str, kind: str) -> str:
+        # search pages keep the bare site key, as in files written before kinds existed
+        return site if kind == "search" else f"{site}/{kind}"
+
+    def mode(self, site: str, kind: str = "search") -> str:
+        rec = self._modes.get(self._key(site, kind)) or {}
+        if rec.get("mode") == "browser" and time.time() - rec.get("at", 0) < FETCH_MODE_TTL:
+            return "browser"
+        return "http"
+
+    def record(self, site: str, mode: str, kind: str = "search") -> None:
+        key = self._key(site, kind)
+        with self._lock:
+            if (self._modes.get(key) or {}).get("mode") == mode and mode == "http":
+                return
+            self._modes[key] = {"mode": mode, "at": time.time()}
+            self._save_modes()
+
+    # --- HTTP ---
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "User-Agent": random.choice(_USER_AGENTS),
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "ro-RO,ro;q=0.9,en;q=0.8",
+            "Accept-Encoding": "gzip, deflate, br" if _HAS_BROTLI else "gzip, deflate",
+        }
+
+    def _http(self):
+        with self._lock:
+            if self._client is None:
+                if httpx is not None:
+                    self._client = httpx.Client(
+                        http2=_HAS_H2,
+                        headers=self._headers(),
+                        follow_redirects=True,
+                        timeout=self.timeout,
+                        limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+                    )
+                else:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    session.headers.update(self._headers())
+                    self._client = session
+            return self._client
+
+    def get_html(self, url: str) -> Optional[tuple[str, str]]:
+        """(html, final_url) over HTTP, or None when the request failed."""
+        host = urlparse(url).netloc
+        RATE_LIMITER.acquire(host)
+        _count_load()
+        start = time.perf_counter()
+        try:
+            if httpx is not None:
+                resp = self._http().get(url)
+            else:
+                resp = self._http().get(url, timeout=self.timeout)
+        except Exception:
+            RATE_LIMITER.report(host, latency=time.perf_counter() - start)
+            return None
+        RATE_LIMITER.report(
+            host, blocked=resp.status_code in (403, 429, 503), latency=time.perf_counter() - start
+        )
+        if resp.status_code != 200:
+            return None
+        return resp.text or "", str(resp.url)
+
+    @staticmethod
+    def _looks_like_shell(html: str) -> bool:
+        lowered = html.lower()
+        return _looks_blocked(lowered) or any(m in lowered for m in _SHELL_MARKERS)
+
+    # --- entry point ---
+    def fetch(
+        self,
+        site: str,
+        url: str,
+        driver,
+        *,
+        parse: Callable[[str, str], object],
+        browser: Callable[[webdriver.Chrome, str], object],
+        ready: Optional[str] = None,
+        kind: str = "search",
+    ):
+        """Fetch `url` and return parse(html, final_url), or the browser result.
+
+        `driver` is a WebDriver, a zero-argument factory for one (called only
+        if escalation is needed), or None to stay on HTTP. `ready` is the CSS
+        selector the browser waits for before the page is snapshotted; `kind`
+        names the sort of page, whose fetch mode is tracked on its own.
+        """
+        result = None
+        use_http = self.mode(site, kind) == "http"
+        if use_http:
+            page = self.get_html(url)
+            if page is not None:
+                result = parse(*page)
+                if result:
+                    self.record(site, "http", kind)
+                    return result
+                known_http = (self._modes.get(self._key(site, kind)) or {}).get("mode") == "http"
+                if known_http and not self._looks_like_shell(page[0]):
+                    return result
+        if driver is None:
+            return result
+        drv = driver() if callable(driver) else driver
+        result = browser(drv, _throttled_get(drv, url, ready=ready))
+        if result and use_http:
+            self.record(site, "browser", kind)
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            if self._client is not None:
+                try:
+                    self._client.close()
+                except Exception:
+                    pass
+                self._client = None
+
+
+FETCHER = Fetcher()
+
+
+def _miss_reason(html: str, driver=None) -> str:
+    """Why a fetched search page had no cards, as a cache.NEG_* code."""
+    if Fetcher._looks_like_shell(html or ""):
+        return "captcha"
+    # readiness from the idle heuristic alone may be results that never
+    # arrived, not an empty page: not worth a long-lived no_cards entry
+    if driver is not None and getattr(driver, "last_ready", "") in (None, "idle"):
+        return "timeout"
+    return "no_cards"
+
+
+def _search_page(site: str, url: str, driver, spec: dict, query: str, **best) -> tuple[dict | None, str | None]:
+    """Best card for `query` on a search page, over HTTP when the site allows it.
+
+    Returns (result, reason): on a miss the reason is one of "captcha",
+    "timeout", "no_cards" or "below_threshold" (the cache.NEG_* codes), on a
+    hit it is None. `best` is passed on to _best_card.
+    """
+    miss = {}
+
+    def parse(html, base_url):
+        cards = _parse_cards(html, spec, base_url)
+        miss["reason"] = None if cards else _miss_reason(html)
+        return cards
+
+    def browser(drv, html):
+        cards = _page_cards(drv, spec, html)
+        miss["reason"] = None if cards else _miss_reason(html, drv)
+        return cards
+
+    try:
+        cards = FETCHER.fetch(site, url, driver, parse=parse, browser=browser, ready=spec["card"]) or []
+    except TimeoutException:
+        return None, "timeout"
+    if not cards:
+        # no page at all (network error with no browser to fall back on) counts as a timeout
+        return None, miss.get("reason") or "timeout"
+    result = _best_card(cards, query, **best)
+    return result, None if result else "below_threshold"
+
+
+# --- product pages ---
+_LD_JSON_RE = re.compile(r"<script[^>]*application/ld\+json[^>]*>(.*?)</script>", re.S | re.I)
+_PRICE_META = ('meta[itemprop="price"]', 'meta[property="product:price:amount"]')
+
+
+def _ld_price(value, thousands_sep: str = "") -> float | None:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return _parse_price(value, thousands_sep=thousands_sep)
+    return None
+
+
+def _ld_product(html: str, thousands_sep: str = "") -> dict:
+    """Title and price from the page's schema.org Product JSON-LD, if any."""
+    for block in _LD_JSON_RE.findall(html):
+        try:
+            data = json.loads(block.strip())
+        except ValueError:
+            continue
+        stack = [data]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, list):
+                stack.extend(node)
+                continue
+            if not isinstance(node, dict):
+                continue
+            if "@graph" in node:
+                stack.append(node["@graph"])
+            kind = node.get("@type")
+            if kind == "Product" or (isinstance(kind, list) and "Product" in kind):
+                offers = node.get("offers")
+                offers = offers[0] if isinstance(offers, list) and offers else offers
+                if isinstance(offers, dict):
+                    price = _ld_price(offers.get("price", offers.get("lowPrice")), thousands_sep)
+                    if price:
+                        return {"title": (node.get("name") or "").strip(), "price": price}
+    return {}
+
+
+def _parse_product(html: str, spec: dict) -> dict | None:
+    """{"title", "price"} of a product page, or None without a price.
+
+    Schema.org JSON-LD is tried first, then price meta tags (microdata /
+    OpenGraph), then the site's `spec` selectors ({"title", "price"} CSS,
+    optional "thousands_sep").
+    """
+    sep = spec.get("thousands_sep", "")
+    found = _ld_product(html, sep)
+    root = None
+    if not found.get("price"):
+        root = _html_root(html)
+        for css in _PRICE_META:
+            price = _ld_price(_node_attr(_select_one(root, css), "content"), sep)
+            if price:
+                break
+        else:
+            price = _parse_price(_node_text(_select_one(root, spec["price"])), thousands_sep=sep)
+        if not price:
+            return None
+        found = {"title": "", "price": price}
+    if not found["title"]:
+        root = root if root is not None else _html_root(html)
+        found["title"] = _node_text(_select_one(root, spec["title"])) or (
+            _node_attr(_select_one(root, 'meta[property="og:title"]'), "content") or ""
+        ).strip()
+    return found
+
+
+def _product_page(site: str, url: str, driver, spec: dict) -> dict | None:
+    """{"title", "price", "url"} read from the product page itself, over HTTP when the site allows it.
+
+    `driver` follows Fetcher.fetch: a WebDriver, a factory for one (used only
+    when HTTP does not yield a price), or None to stay on HTTP. The result
+    keeps `url` as given so cache entries stay keyed the same way.
+    """
+    try:
+        found = FETCHER.fetch(
+            site,
+            url,
+            driver,
+            parse=lambda html, _url: _parse_product(html, spec),
+            browser=lambda _drv, html: _parse_product(html or "", spec),
+            ready=spec["price"],
+            kind="product",
+        )
+    except TimeoutException:
+        return None
+    if not found:
+        return None
+    return {"title": found["title"] or None, "price": found["price"], "url": url}
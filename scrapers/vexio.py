@@ -1,69 +1,56 @@
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-
-from .utils import _throttled_get, _match_score
+from .utils import _search_page
+from .refresh import _live_result, _make_refresher, _serve_cached, _serve_catalog
 
 try:
     from cache import (
         get_for_query as cache_get_for_query,
+        get_negative as cache_get_negative,
         upsert_for_query as cache_upsert_for_query,
         upsert as cache_upsert,
+        upsert_negative as cache_upsert_negative,
     )
 except Exception:
     cache_get_for_query = None
+    cache_get_negative = None
     cache_upsert_for_query = None
     cache_upsert = None
+    cache_upsert_negative = None
+
+
+_CARD_SPEC = {
+    "card": "article.product-box",
+    "fields": {
+        "title": ("h2.name a", "text"),
+        "price_text": ("div.price-value span", "text"),
+        "href": ("h2.name a", "href"),
+    },
+}
+
+# Product page fallbacks for when the page has no schema.org JSON-LD / price meta.
+_PRODUCT_SPEC = {
+    "title": "h1",
+    "price": "div.price-value span",
+}
 
 
-def search_vexio(product_name: str, driver):
-    if cache_get_for_query is not None:
+def search_vexio(product_name: str, driver, *, use_cache: bool = True):
+    # a stale hit is served and refreshed in the background
+    if use_cache and cache_get_for_query is not None:
         cached = cache_get_for_query("vexio", product_name)
         if cached:
-            return {
-                "title": cached.get("title"),
-                "price": cached.get("price"),
-                "url": cached.get("url"),
-                "specs": cached.get("specs"),
-            }
-    best_result = None
-    best_score = 0.0
+            return _serve_cached("vexio", product_name, cached, search_vexio)
+        # recently found nothing: skip the page load until the negative entry expires
+        if cache_get_negative is not None and cache_get_negative("vexio", product_name):
+            return None
+    # then the offline catalog built from the crawler dump; its price is as old as the dump
+    if use_cache:
+        served = _serve_catalog("vexio", product_name, search_vexio, driver)
+        if served:
+            return served
+    best_result, miss = None, None
     try:
         url = f"https://www.vexio.ro/search?q={product_name.replace(' ', '%20')}"
-        _throttled_get(driver, url)
-        WebDriverWait(driver, 5).until(
-            EC.presence_of_all_elements_located((By.CSS_SELECTOR, "article.product-box"))
-        )
-        products = driver.find_elements(By.CSS_SELECTOR, "article.product-box")
-        for p in products:
-            try:
-                title = p.find_element(By.CSS_SELECTOR, "h2.name a").text.strip()
-                score = _match_score(title, product_name)
-                if score < 60:
-                    continue
-                price = None
-                try:
-                    price_text = (
-                        p.find_element(By.CSS_SELECTOR, "div.price-value span")
-                        .text.replace("lei", "")
-                        .replace("\u00a0", "")
-                        .replace(",", ".")
-                    )
-                    price = float(price_text)
-                except Exception:
-                    pass
-                link = None
-                try:
-                    link = p.find_element(By.CSS_SELECTOR, "h2.name a").get_attribute("href")
-                except Exception:
-                    pass
-                if score > best_score and price and link:
-                    best_result = {"title": title, "price": price, "url": link}
-                    best_score = score
-                    if best_score >= 95:
-                        break
-            except Exception:
-                continue
+        best_result, miss = _search_page("vexio", url, driver, _CARD_SPEC, product_name)
     except Exception:
         pass
     if best_result:
@@ -77,4 +64,12 @@ def search_vexio(product_name: str, driver):
                 cache_upsert("vexio", best_result)
             except Exception:
                 pass
-    return best_result
+    elif miss and cache_upsert_negative is not None:
+        try:
+            cache_upsert_negative("vexio", product_name, miss)
+        except Exception:
+            pass
+    return _live_result(best_result)
+
+
+refresh_vexio = _make_refresher("vexio", _PRODUCT_SPEC)
@@ -0,0 +1,298 @@
+"""Watchlist daemon: re-checks tracked products and alerts when a price drops to its target.
+
+The watchlist is a JSON list of entries, each a search query (checked on
+every site, or on `sites`) or a product URL, with a target price:
+
+    [
+        {"query": "RTX 4070 Super", "target": 3000, "sites": ["emag", "altex"], "priority": 2},
+        {"url": "https://altex.ro/.../cpd/ABC123/", "target": 1500}
+    ]
+
+Checks are grouped by site: one worker per site runs its checks in order of
+due time, so each host sees a single stream of requests (still paced by the
+shared per-host limiter), and drivers are leased from one DriverPool instead
+of started per check. A check whose cached price is still fresh costs no
+page load; the others draw on a global pages-per-hour budget, one unit per
+page actually loaded (a PC Garage search and its specs page are two, as is a
+re-price that falls back to a search). URLs, and
+queries whose product URL is already cached, are re-priced from the product
+page (one light request) rather than searched again. An entry is
+due every `interval / priority` seconds (with a little jitter, so checks
+spread out). An alert is emitted, printed and appended to ALERTS_FILE when
+a price goes from above the target (or unknown) to at or below it.
+
+Usage:
+    python -m scrapers.watch watchlist.json [--pages-per-hour 300] [--interval 3600]
+                                           [--drivers 2] [--report-every 60] [--once]
+"""
+import argparse
+import heapq
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .orchestrator import REFRESHERS, SEARCHERS, SITE_LABELS, _LazyDriver, site_for_url
+from .ratelimit import HostRateLimiter
+from .sink import JsonlSink
+from .utils import DATA_DIR, DriverPool, _build_driver, _page_loads
+
+try:
+    from cache import _find_by_url, get_for_query, is_stale
+except Exception:
+    _find_by_url = None
+    get_for_query = None
+    is_stale = None
+
+
+ALERTS_FILE = os.path.join(DATA_DIR, "alerts.jsonl")
+# Seconds between checks of a priority-1 entry.
+WATCH_INTERVAL = 3600.0
+# Page loads per hour across all sites; fresh cache hits do not count.
+PAGES_PER_HOUR = 300
+_JITTER = 0.1
+
+
+def load_watchlist(path: str) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    if not isinstance(entries, list):
+        raise ValueError("the watchlist must be a JSON list")
+    for entry in entries:
+        if not (entry.get("query") or entry.get("url")) or entry.get("target") is None:
+            raise ValueError(f"watchlist entry needs a query or url and a target: {entry!r}")
+    return entries
+
+
+class _Check:
+    """One (watchlist entry, site) pair and its schedule."""
+
+    def __init__(self, entry: Dict[str, Any], site: str, due: float):
+        self.entry = entry
+        self.site = site
+        self.due = due
+        self.query = (entry.get("query") or "").strip() or None
+        self.url = (entry.get("url") or "").strip() or None
+        self.target = float(entry["target"])
+        self.priority = max(0.1, float(entry.get("priority", 1)))
+        self.price: Optional[float] = None
+        self.below = False
+
+    @property
+    def label(self) -> str:
+        return self.query or self.url
+
+
+class Watcher:
+    """Runs the checks of a watchlist on a schedule; see the module docstring."""
+
+    def __init__(
+        self,
+        entries: List[Dict[str, Any]],
+        *,
+        pages_per_hour: float = PAGES_PER_HOUR,
+        interval: float = WATCH_INTERVAL,
+        pool: Optional[DriverPool] = None,
+        driver_factory: Callable = lambda: _build_driver(headless=True),
+        alerts_file: Optional[str] = ALERTS_FILE,
+        on_alert: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
+        self.interval = interval
+        self.pages_per_hour = pages_per_hour
+        self.pool = pool
+        self.driver_factory = driver_factory
+        self.alerts_file = alerts_file
+        self.on_alert = on_alert
+        rate = pages_per_hour / 3600.0
+        self._budget = HostRateLimiter(
+            initial_rate=rate, min_rate=rate, max_rate=rate, jitter=0.0, state_file=None
+        )
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._queues: Dict[str, list] = {}
+        self.started = time.monotonic()
+        self.stats = {"checks": 0, "live": 0, "pages": 0, "cached": 0, "failed": 0, "alerts": 0}
+
+        checks = []
+        for entry in entries:
+            if entry.get("url"):
+                site = site_for_url(entry["url"])
+                sites = [site] if site else []
+            else:
+                sites = [s for s in (entry.get("sites") or SEARCHERS) if s in SEARCHERS]
+            checks.extend(_Check(entry, site, 0.0) for site in sites)
+        # first round spread over one budget interval per check, highest priority first
+        spacing = 3600.0 / pages_per_hour if pages_per_hour > 0 else 0.0
+        now = time.time()
+        for i, check in enumerate(sorted(checks, key=lambda c: -c.priority)):
+            check.due = now + i * spacing
+            self._push(check)
+
+    def _push(self, check: _Check) -> None:
+        heapq.heappush(self._queues.setdefault(check.site, []), (check.due, next(self._seq), check))
+
+    def _spend(self) -> bool:
+        """Take one page from the budget, waiting for it unless stop() is called; False if stopped."""
+        delay = self._budget.reserve("pages")
+        return not (delay > 0 and self._stop.wait(delay))
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += n
+
+    # --- checking ---
+    def _cached(self, check: _Check) -> Optional[Dict[str, Any]]:
+        """The cached result for a check if it is still fresh (no page needed)."""
+        if is_stale is None:
+            return None
+        if check.query:
+            item = get_for_query(check.site, check.query)
+        else:
+            item = _find_by_url(check.site, check.url)
+        return item if item and not is_stale(check.site, item) else None
+
+    def _fetch(self, check: _Check, driver: _LazyDriver) -> Optional[Dict[str, Any]]:
+        refresh = REFRESHERS[check.site]
+        if check.url:
+            return refresh(check.url, driver)
+        # a query whose product is already known is re-priced from its page;
+        # the search runs only for new queries or when that page has no price
+        known = get_for_query(check.site, check.query, max_age=float("inf")) if get_for_query else None
+        if known and known.get("url"):
+            result = refresh(known["url"], driver, query=check.query)
+            if result:
+                return result
+        return SEARCHERS[check.site](check.query, driver, use_cache=False)
+
+    def check(self, check: _Check) -> Optional[Dict[str, Any]]:
+        """Run one check now; returns the result it saw (None if nothing was found)."""
+        result = self._cached(check)
+        if result is not None:
+            self._count("cached")
+        else:
+            # the first page is paid up front; any further loads of this check
+            # (retries, spec pages, a search fallback) are charged once known
+            if not self._spend():
+                return None
+            before = _page_loads()
+            driver = _LazyDriver(self.driver_factory, self.pool)
+            try:
+                result = self._fetch(check, driver)
+            except Exception:
+                result = None
+            finally:
+                driver.release()
+            loads = _page_loads() - before
+            for _ in range(loads - 1):
+                if not self._spend():
+                    break
+            self._count("live")
+            self._count("pages", loads)
+        self._count("checks")
+        price = result.get("price") if result else None
+        if not isinstance(price, (int, float)):
+            self._count("failed")
+            return result
+        below = price <= check.target
+        if below and not check.below:
+            self._alert(check, result)
+        check.price, check.below = float(price), below
+        return result
+
+    def _alert(self, check: _Check, result: Dict[str, Any]) -> None:
+        alert = {
+            "at": time.time(),
+            "site": check.site,
+            "watch": check.label,
+            "target": check.target,
+            "previous": check.price,
+            "price": float(result["price"]),
+            "title": result.get("title"),
+            "url": result.get("url"),
+        }
+        self._count("alerts")
+        print(
+            f"[alertă] {SITE_LABELS.get(check.site, check.site)}: {alert['title']} - {alert['price']} Lei "
+            f"(țintă {check.target:g})\n{alert['url']}"
+        )
+        if self.alerts_file:
+            try:
+                with JsonlSink(self.alerts_file, append=True) as sink:
+                    sink.write(alert)
+            except OSError:
+                pass
+        if self.on_alert is not None:
+            self.on_alert(alert)
+
+    # --- scheduling ---
+    def _run_site(self, site: str, once: bool) -> None:
+        queue = self._queues[site]
+        while queue and not self._stop.is_set():
+            due, _, check = queue[0]
+            wait = due - time.time()
+            if wait > 0 and not once:
+                self._stop.wait(wait)
+                continue
+            heapq.heappop(queue)
+            self.check(check)
+            if not once:
+                period = self.interval / check.priority
+                check.due = time.time() + period * random.uniform(1 - _JITTER, 1 + _JITTER)
+                self._push(check)
+
+    def report(self) -> str:
+        with self._lock:
+            s = dict(self.stats)
+        hours = max(1e-9, (time.monotonic() - self.started) / 3600.0)
+        return (
+            f"[watch] verificări: {s['checks']} (live {s['live']}, din cache {s['cached']}, fără preț {s['failed']}) | "
+            f"{s['pages']} pagini, {s['pages'] / hours:.0f}/h din {self.pages_per_hour:g} | alerte: {s['alerts']}"
+        )
+
+    def run(self, *, once: bool = False, report_every: float = 60.0) -> None:
+        """Check until stop() (or Ctrl+C); with `once`, every check runs one time."""
+        threads = [
+            threading.Thread(target=self._run_site, args=(site, once), name=f"watch-{site}", daemon=True)
+            for site in self._queues
+        ]
+        for t in threads:
+            t.start()
+        next_report = time.monotonic() + report_every
+        try:
+            while any(t.is_alive() for t in threads):
+                time.sleep(0.2)
+                if report_every and time.monotonic() >= next_report:
+                    print(self.report())
+                    next_report += report_every
+        except KeyboardInterrupt:
+            self.stop()
+            for t in threads:
+                t.join()
+        print(self.report())
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Re-check a watchlist and alert on price drops")
+    parser.add_argument("watchlist", help="JSON list of {query|url, target, [sites], [priority]}")
+    parser.add_argument("--pages-per-hour", type=float, default=PAGES_PER_HOUR, help="page-load budget")
+    parser.add_argument("--interval", type=float, default=WATCH_INTERVAL, help="seconds between checks at priority 1")
+    parser.add_argument("--drivers", type=int, default=2, help="Chrome drivers shared by all sites")
+    parser.add_argument("--report-every", type=float, default=60.0, help="seconds between throughput reports")
+    parser.add_argument("--once", action="store_true", help="check every entry once and exit")
+    args = parser.parse_args(argv)
+
+    entries = load_watchlist(args.watchlist)
+    with DriverPool(size=args.drivers, factory=lambda: _build_driver(headless=True)) as pool:
+        watcher = Watcher(entries, pages_per_hour=args.pages_per_hour, interval=args.interval, pool=pool)
+        watcher.run(once=args.once, report_every=args.report_every)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,49 +1,57 @@
-import json, os, time, random
-from typing import List, Dict, Any
+import argparse, os, random, sys, threading, time
+from queue import Empty, Queue
+from typing import Any, Callable, Dict, Iterator, List, Set, Tuple
 from urllib.parse import urljoin, urlparse
 
+import requests
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+
+# share the driver setup and pool with the bot (repo root on sys.path)
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+from scrapers.checkpoint import CrawlCheckpoint  # noqa: E402
+from scrapers.ratelimit import HostRateLimiter  # noqa: E402
+from scrapers.utils import (  # noqa: E402
+    _USER_AGENTS,
+    DriverPool,
+    _build_driver,
+    _looks_blocked,
+    _navigate,
+    _parse_cards,
+    _settle_idle,
+    _wait_ready,
+)
+
+# Shared by all workers of this process: one adaptive budget per host, much
+# faster than the bot's, which is tuned for a handful of interactive searches.
+LIMITER = HostRateLimiter(initial_rate=4.0, min_rate=0.2, max_rate=8.0, increase=0.05, cooldown=10.0, state_file=None)
+
+# Same fields as crawl_page reads from the live DOM, for HTTP workers.
+_LISTING_SPEC = {
+    "card": "li.Products-item",
+    "fields": {
+        "title": ("span.Product-name", "text"),
+        "href": ("a[title]", "href"),
+        "price_text": (".Price, span.Price-int", "text"),
+    },
+}
 
 
 def build_driver() -> webdriver.Chrome:
-    opts = Options()
-    opts.add_argument("--headless=new")
-    opts.add_argument("--no-sandbox")
-    opts.add_argument("--disable-dev-shm-usage")
-    opts.add_argument("--log-level=3")
-    opts.add_argument("--disable-blink-features=AutomationControlled")
-    opts.add_experimental_option(
-        "excludeSwitches", ["enable-automation", "enable-logging"]
-    )
-    opts.add_experimental_option("useAutomationExtension", False)
-    prefs = {"profile.default_content_setting_values": {"images": 2}}
-    opts.add_experimental_option("prefs", prefs)
-    user_agents = [
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-    ]
-    opts.add_argument(f"--user-agent={random.choice(user_agents)}")
-    driver = webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()), options=opts
+    return _build_driver(headless=True, page_load_timeout=15)
+
+
+def build_session() -> requests.Session:
+    session = requests.Session()
+    session.headers.update(
+        {
+            "User-Agent": random.choice(_USER_AGENTS),
+            "Accept-Language": "ro-RO,ro;q=0.9,en;q=0.8",
+        }
     )
-    driver.set_page_load_timeout(15)
-    try:
-        driver.execute_cdp_cmd(
-            "Page.addScriptToEvaluateOnNewDocument",
-            {
-                "source": "Object.defineProperty(navigator, 'webdriver', {get: () => undefined});"
-            },
-        )
-    except Exception:
-        pass
-    return driver
+    return session
 
 
 def parse_price(text: str) -> float | None:
@@ -67,13 +75,21 @@ def parse_price(text: str) -> float | None:
 
 
 def safe_get(
-    driver: webdriver.Chrome, url: str, retries: int = 2, wait_after: float = 0.2
+    driver: webdriver.Chrome, url: str, retries: int = 2, ready: str | None = None, timeout: float = 5
 ) -> None:
+    """Load `url` and wait until `ready` (a CSS selector) matches.
+
+    A page whose network went idle first gets the rest of the page-load
+    timeout for `ready` (see _settle_idle), so slow results do not end a
+    category early.
+    """
     last_exc = None
     for attempt in range(retries + 1):
         try:
-            driver.get(url)
-            time.sleep(wait_after)
+            start = time.perf_counter()
+            _navigate(driver, url)
+            state = _wait_ready(driver, ready, timeout=timeout)
+            driver.last_ready = _settle_idle(driver, ready, state, time.perf_counter() - start)
             return
         except Exception as e:
             last_exc = e
@@ -83,14 +99,13 @@ def safe_get(
 
 
 def crawl_page(driver: webdriver.Chrome, url: str) -> List[Dict[str, Any]]:
-    safe_get(driver, url)
-    try:
-        WebDriverWait(driver, 3).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "body"))
-        )
-    except Exception:
-        pass
+    host = urlparse(url).netloc
+    LIMITER.acquire(host)
+    start = time.perf_counter()
+    safe_get(driver, url, ready="li.Products-item", timeout=3)
     items = driver.find_elements(By.CSS_SELECTOR, "li.Products-item")
+    blocked = not items and _looks_blocked(driver.page_source or "")
+    LIMITER.report(host, blocked=blocked, latency=time.perf_counter() - start)
     results: List[Dict[str, Any]] = []
     for el in items:
         try:
@@ -117,11 +132,42 @@ def crawl_page(driver: webdriver.Chrome, url: str) -> List[Dict[str, Any]]:
     return results
 
 
-def crawl_listing(
-    driver: webdriver.Chrome, base_url: str, max_pages: int = 3
-) -> List[Dict[str, Any]]:
-    all_items: List[Dict[str, Any]] = []
-    for page in range(1, max_pages + 1):
+def crawl_page_http(session: requests.Session, url: str) -> List[Dict[str, Any]]:
+    """crawl_page over plain HTTP: the listing is server-rendered."""
+    host = urlparse(url).netloc
+    LIMITER.acquire(host)
+    start = time.perf_counter()
+    try:
+        resp = session.get(url, timeout=15)
+    except requests.RequestException:
+        LIMITER.report(host, latency=time.perf_counter() - start)
+        return []
+    html = resp.text or ""
+    blocked = resp.status_code in (403, 429, 503) or _looks_blocked(html)
+    LIMITER.report(host, blocked=blocked, latency=time.perf_counter() - start)
+    if resp.status_code != 200:
+        return []
+    results: List[Dict[str, Any]] = []
+    for card in _parse_cards(html, _LISTING_SPEC, str(resp.url)):
+        if card["title"] and card["href"]:
+            results.append({"title": card["title"], "price": parse_price(card["price_text"]), "url": card["href"]})
+    return results
+
+
+def iter_listing(
+    fetch_page: Callable[[str], List[Dict[str, Any]]],
+    base_url: str,
+    max_pages: int = 3,
+    *,
+    start_page: int = 1,
+    seen: Set[str] | None = None,
+) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+    """Yield (page, new items) as each page is crawled, de-duplicated by URL against `seen`.
+
+    `fetch_page(url)` returns a page's items, e.g. crawl_page bound to a driver.
+    """
+    seen = set() if seen is None else seen
+    for page in range(start_page, max_pages + 1):
         if page == 1:
             url = base_url
         else:
@@ -129,31 +175,28 @@ def crawl_listing(
                 url = urljoin(base_url, f"p/{page}/")
             else:
                 url = urljoin(base_url + "/", f"p/{page}/")
-        page_items = crawl_page(driver, url)
+        page_items = fetch_page(url)
         print(f"[Altex] {url} -> {len(page_items)} items")
         if not page_items:
             break
-        all_items.extend(page_items)
-        time.sleep(0.05)
-    # de-duplicate by URL
-    seen = set()
-    deduped = []
-    for r in all_items:
-        key = r.get("url")
-        if key and key not in seen:
-            deduped.append(r)
-            seen.add(key)
-    return deduped
+        new_items = []
+        for r in page_items:
+            key = r.get("url")
+            if key and key not in seen:
+                new_items.append(r)
+                seen.add(key)
+        yield page, new_items
+
+
+def crawl_listing(
+    driver: webdriver.Chrome, base_url: str, max_pages: int = 3
+) -> List[Dict[str, Any]]:
+    pages = iter_listing(lambda url: crawl_page(driver, url), base_url, max_pages)
+    return [r for _, items in pages for r in items]
 
 
 def get_main_categories(driver: webdriver.Chrome) -> List[str]:
-    safe_get(driver, "https://altex.ro/")
-    try:
-        WebDriverWait(driver, 1).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "body"))
-        )
-    except Exception:
-        pass
+    safe_get(driver, "https://altex.ro/", ready="a[href*='/cpl/']")
     links = driver.find_elements(By.CSS_SELECTOR, "a[href*='/cpl/']")
     categories = set()
     for a in links:
@@ -170,29 +213,193 @@ def get_main_categories(driver: webdriver.Chrome) -> List[str]:
     return sorted(categories)
 
 
-def main():
-    driver = build_driver()
-    all_results: List[Dict[str, Any]] = []
-    try:
-        categories = get_main_categories(driver)
+class CrawlStats:
+    """Thread-safe page/item counters with a periodic throughput line."""
+
+    def __init__(self):
+        self.start = time.monotonic()
+        self.pages = 0
+        self.items = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def add(self, items: int) -> None:
+        with self._lock:
+            self.pages += 1
+            self.items += items
+
+    def line(self) -> str:
+        elapsed = max(time.monotonic() - self.start, 1e-9)
+        with self._lock:
+            pages, items = self.pages, self.items
+        return f"{pages} pages ({pages / elapsed:.2f}/s), {items} items ({items / elapsed:.1f}/s) in {elapsed:.0f}s"
+
+    def report_every(self, interval: float) -> None:
+        def run():
+            while not self._stop.wait(interval):
+                print(f"[stats] {self.line()}")
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+class _Claims:
+    """URLs already written by any worker; a URL goes to the output once."""
+
+    def __init__(self, urls=()):
+        self._urls = set(urls)
+        self._lock = threading.Lock()
+
+    def new(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        with self._lock:
+            fresh = [i for i in items if i["url"] not in self._urls]
+            self._urls.update(i["url"] for i in fresh)
+        return fresh
+
+
+def crawl_category(
+    fetch_page: Callable[[str], List[Dict[str, Any]]],
+    cat_url: str,
+    checkpoint: CrawlCheckpoint,
+    claims: _Claims,
+    stats: CrawlStats,
+    max_pages: int = 3,
+    stop: threading.Event | None = None,
+) -> None:
+    pages = iter_listing(
+        fetch_page,
+        cat_url,
+        max_pages=max_pages,
+        start_page=checkpoint.next_page(cat_url),
+        seen=checkpoint.seen(cat_url),
+    )
+    for page, items in pages:
+        items = claims.new(items)
+        for i in items:
+            i["category"] = cat_url
+        checkpoint.commit_page(cat_url, page, items)
+        stats.add(len(items))
+        if stop is not None and stop.is_set():
+            return  # left unfinished: --resume continues from the next page
+    checkpoint.finish_category(cat_url)
+
+
+def crawl_worker(
+    todo: "Queue[str]",
+    checkpoint: CrawlCheckpoint,
+    claims: _Claims,
+    stats: CrawlStats,
+    *,
+    pool: DriverPool | None = None,
+    max_pages: int = 3,
+    stop: threading.Event | None = None,
+) -> None:
+    """Take categories off `todo` until it is empty or `stop` is set, with a
+    leased browser or (no pool) an HTTP session."""
+    session = build_session() if pool is None else None
+    while stop is None or not stop.is_set():
+        try:
+            cat_url = todo.get_nowait()
+        except Empty:
+            return
+        print(f"[*] Crawling category: {cat_url}")
+        try:
+            if pool is None:
+                crawl_category(
+                    lambda url: crawl_page_http(session, url), cat_url, checkpoint, claims, stats, max_pages, stop
+                )
+            else:
+                # one lease per category: cookies are reset in between and the
+                # driver is recycled by the pool after enough pages
+                with pool.lease() as driver:
+                    crawl_category(
+                        lambda url: crawl_page(driver, url), cat_url, checkpoint, claims, stats, max_pages, stop
+                    )
+        except Exception as e:
+            # left unfinished in the checkpoint, so --resume retries it
+            print(f"[!] {cat_url} failed: {e}")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Crawl every Altex /cpl/ category.")
+    parser.add_argument("--output", help="JSON Lines output (default: ./altex_all_categories.jsonl[.gz|.zst])")
+    parser.add_argument("--compress", choices=("gzip", "zstd"), help="compress the output stream")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted crawl from its checkpoint")
+    parser.add_argument("--checkpoint", help="checkpoint log (default: <output>.checkpoint)")
+    parser.add_argument("--workers", type=int, default=1, help="categories crawled in parallel (default: 1)")
+    parser.add_argument("--http", action="store_true", help="workers use HTTP sessions instead of browsers")
+    parser.add_argument("--rate", type=float, default=4.0, help="starting requests/s for altex.ro, shared by all workers")
+    parser.add_argument("--max-pages", type=int, default=3, help="pages per category (default: 3)")
+    parser.add_argument("--stats-every", type=float, default=10.0, help="seconds between throughput lines")
+    args = parser.parse_args(argv)
+    if not args.output:
+        suffix = {"gzip": ".gz", "zstd": ".zst"}.get(args.compress, "")
+        args.output = os.path.join(os.getcwd(), "altex_all_categories.jsonl" + suffix)
+    args.checkpoint = args.checkpoint or args.output + ".checkpoint"
+    args.workers = max(1, args.workers)
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    LIMITER.initial_rate = args.rate
+    LIMITER.max_rate = max(LIMITER.max_rate, 2 * args.rate)
+    # items are appended to the output page by page, nothing is kept in memory,
+    # and every page is checkpointed; workers pull categories off one queue,
+    # so fast ones take over the remaining categories
+    checkpoint = CrawlCheckpoint(
+        args.checkpoint, args.output, compress=args.compress, resume=args.resume, history="altex"
+    )
+    pool_size = 1 if args.http else args.workers
+    with DriverPool(size=pool_size, factory=build_driver) as pool, checkpoint:
+        with pool.lease() as driver:
+            categories = get_main_categories(driver)
         print(f"Found {len(categories)} main categories:\n")
         for idx, cat in enumerate(categories, 1):
             print(f"{idx}. {cat}")
         print("\n--- Starting crawling ---\n")
+
+        todo: "Queue[str]" = Queue()
         for cat_url in categories:
-            print(f"[*] Crawling category: {cat_url}")
-            items = crawl_listing(driver, cat_url, max_pages=3)
-            for i in items:
-                i["category"] = cat_url
-            all_results.extend(items)
-    finally:
-        driver.quit()
-
-    output_file = os.path.join(os.getcwd(), "altex_all_categories.json")
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(all_results, f, ensure_ascii=False, indent=2)
-    print(f"\nSaved {len(all_results)} items to {output_file}")
+            if checkpoint.is_done(cat_url):
+                print(f"[*] Already crawled, skipping: {cat_url}")
+            else:
+                todo.put(cat_url)
+        claims = _Claims(url for cat in categories for url in checkpoint.seen(cat))
+        stats = CrawlStats()
+        stats.report_every(args.stats_every)
+        stop = threading.Event()
+        workers = [
+            threading.Thread(
+                target=crawl_worker,
+                args=(todo, checkpoint, claims, stats),
+                kwargs={"pool": None if args.http else pool, "max_pages": args.max_pages, "stop": stop},
+                name=f"altex-{n}",
+                daemon=True,
+            )
+            for n in range(min(args.workers, todo.qsize()))
+        ]
+        for w in workers:
+            w.start()
+        try:
+            for w in workers:
+                w.join()
+        except KeyboardInterrupt:
+            # workers finish their current page, then stop; the sink and pool
+            # are closed only once they have, and the crawl stays unfinished
+            print("\n[!] Interrupted, waiting for the pages in flight (Ctrl+C again to abort)...")
+            stop.set()
+            for w in workers:
+                w.join()
+            print(f"[stats] {stats.line()}\nRun again with --resume to continue.")
+            raise SystemExit(130)
+        finally:
+            stats.stop()
+    total = checkpoint.resumed_items + checkpoint.sink.count
+    print(f"\n[stats] {stats.line()}")
+    print(f"Saved {total} items to {args.output}")
 
 
 if __name__ == "__main__":
@@ -1,47 +1,20 @@
-import json, os, time, random
-from typing import List, Dict, Any
-from urllib.parse import urljoin, urlparse
+import argparse, os, sys, time
+from typing import Any, Dict, Iterator, List, Set, Tuple
+from urllib.parse import urljoin
 
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+
+# share the driver setup and pool with the bot (repo root on sys.path)
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+from scrapers.checkpoint import CrawlCheckpoint  # noqa: E402
+from scrapers.utils import DriverPool, _build_driver, _navigate, _settle_idle, _wait_ready  # noqa: E402
 
 
 def build_driver() -> webdriver.Chrome:
-    opts = Options()
-    opts.add_argument("--headless=new")
-    opts.add_argument("--no-sandbox")
-    opts.add_argument("--disable-dev-shm-usage")
-    opts.add_argument("--log-level=3")
-    opts.add_argument("--disable-blink-features=AutomationControlled")
-    opts.add_experimental_option(
-        "excludeSwitches", ["enable-automation", "enable-logging"]
-    )
-    opts.add_experimental_option("useAutomationExtension", False)
-    prefs = {"profile.default_content_setting_values": {"images": 2}}
-    opts.add_experimental_option("prefs", prefs)
-    user_agents = [
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-    ]
-    opts.add_argument(f"--user-agent={random.choice(user_agents)}")
-    driver = webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()), options=opts
-    )
-    driver.set_page_load_timeout(15)
-    try:
-        driver.execute_cdp_cmd(
-            "Page.addScriptToEvaluateOnNewDocument",
-            {"source": "Object.defineProperty(navigator, 'webdriver', {get: () => undefined});"},
-        )
-    except Exception:
-        pass
-    return driver
+    return _build_driver(headless=True, page_load_timeout=15)
 
 
 def parse_price(text: str) -> float | None:
@@ -64,12 +37,22 @@ def parse_price(text: str) -> float | None:
         return None
 
 
-def safe_get(driver: webdriver.Chrome, url: str, retries: int = 2, wait_after: float = 0.3) -> None:
+def safe_get(
+    driver: webdriver.Chrome, url: str, retries: int = 2, ready: str | None = None, timeout: float = 5
+) -> None:
+    """Load `url` and wait until `ready` (a CSS selector) matches.
+
+    A page whose network went idle first gets the rest of the page-load
+    timeout for `ready` (see _settle_idle), so slow results do not end a
+    category early.
+    """
     last_exc = None
     for attempt in range(retries + 1):
         try:
-            driver.get(url)
-            time.sleep(wait_after)
+            start = time.perf_counter()
+            _navigate(driver, url)
+            state = _wait_ready(driver, ready, timeout=timeout)
+            driver.last_ready = _settle_idle(driver, ready, state, time.perf_counter() - start)
             return
         except Exception as e:
             last_exc = e
@@ -79,14 +62,7 @@ def safe_get(driver: webdriver.Chrome, url: str, retries: int = 2, wait_after: f
 
 
 def crawl_page(driver: webdriver.Chrome, url: str) -> List[Dict[str, Any]]:
-    safe_get(driver, url)
-    try:
-        WebDriverWait(driver, 5).until(
-            EC.presence_of_all_elements_located((By.CSS_SELECTOR, "article.product-box"))
-        )
-    except Exception:
-        return []
-
+    safe_get(driver, url, ready="article.product-box")
     items = driver.find_elements(By.CSS_SELECTOR, "article.product-box")
     results: List[Dict[str, Any]] = []
     for el in items:
@@ -111,9 +87,17 @@ def crawl_page(driver: webdriver.Chrome, url: str) -> List[Dict[str, Any]]:
     return results
 
 
-def crawl_listing(driver: webdriver.Chrome, base_url: str, max_pages: int = 50) -> List[Dict[str, Any]]:
-    all_items: List[Dict[str, Any]] = []
-    page = 1
+def iter_listing(
+    driver: webdriver.Chrome,
+    base_url: str,
+    max_pages: int = 50,
+    *,
+    start_page: int = 1,
+    seen: Set[str] | None = None,
+) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+    """Yield (page, new items) as each page is crawled, de-duplicated by URL against `seen`."""
+    seen = set() if seen is None else seen
+    page = start_page
 
     while page <= max_pages:
         url = base_url if page == 1 else urljoin(base_url, f"pagina{page}/")
@@ -122,7 +106,13 @@ def crawl_listing(driver: webdriver.Chrome, base_url: str, max_pages: int = 50)
 
         if not page_items:
             break
-        all_items.extend(page_items)
+        new_items = []
+        for r in page_items:
+            key = r.get("url")
+            if key and key not in seen:
+                new_items.append(r)
+                seen.add(key)
+        yield page, new_items
 
         # verificăm dacă există butonul de „next”
         try:
@@ -132,28 +122,14 @@ def crawl_listing(driver: webdriver.Chrome, base_url: str, max_pages: int = 50)
             # nu există butonul de next -> am terminat
             break
 
-        time.sleep(0.2)
 
-    # de-duplicate by URL
-    seen = set()
-    deduped = []
-    for r in all_items:
-        key = r.get("url")
-        if key and key not in seen:
-            deduped.append(r)
-            seen.add(key)
-    return deduped
+def crawl_listing(driver: webdriver.Chrome, base_url: str, max_pages: int = 50) -> List[Dict[str, Any]]:
+    return [r for _, items in iter_listing(driver, base_url, max_pages) for r in items]
 
 
 
 def get_main_categories(driver: webdriver.Chrome) -> List[str]:
-    safe_get(driver, "https://www.vexio.ro/")
-    try:
-        WebDriverWait(driver, 5).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "li.lvl1 a"))
-        )
-    except Exception:
-        return []
+    safe_get(driver, "https://www.vexio.ro/", ready="li.lvl1 a")
 
     links = driver.find_elements(By.CSS_SELECTOR, "li.lvl1 a[href]")
     categories = set()
@@ -167,11 +143,31 @@ def get_main_categories(driver: webdriver.Chrome) -> List[str]:
     return sorted(categories)
 
 
-def main():
-    driver = build_driver()
-    all_results: List[Dict[str, Any]] = []
-    try:
-        categories = get_main_categories(driver)
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Crawl every Vexio main category with Selenium.")
+    parser.add_argument("--output", help="JSON Lines output (default: ./vexio_all_categories.jsonl[.gz|.zst])")
+    parser.add_argument("--compress", choices=("gzip", "zstd"), help="compress the output stream")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted crawl from its checkpoint")
+    parser.add_argument("--checkpoint", help="checkpoint log (default: <output>.checkpoint)")
+    args = parser.parse_args(argv)
+    if not args.output:
+        suffix = {"gzip": ".gz", "zstd": ".zst"}.get(args.compress, "")
+        args.output = os.path.join(os.getcwd(), "vexio_all_categories.jsonl" + suffix)
+    args.checkpoint = args.checkpoint or args.output + ".checkpoint"
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # items are appended to the output page by page, nothing is kept in memory,
+    # and every page is checkpointed; one lease per category: cookies are reset
+    # in between and the driver is recycled by the pool after enough pages
+    checkpoint = CrawlCheckpoint(
+        args.checkpoint, args.output, compress=args.compress, resume=args.resume, history="vexio"
+    )
+    with DriverPool(size=1, factory=build_driver) as pool, checkpoint:
+        with pool.lease() as driver:
+            categories = get_main_categories(driver)
         total = len(categories)
         print(f"Found {total} main categories:\n")
         for idx, cat in enumerate(categories, 1):
@@ -180,17 +176,24 @@ def main():
 
         for idx, cat_url in enumerate(categories, start=1):
             print(f"[*] Crawling category {idx}/{total}: {cat_url}")
-            items = crawl_listing(driver, cat_url, max_pages=3)
-            for i in items:
-                i["category"] = cat_url
-            all_results.extend(items)
-    finally:
-        driver.quit()
-
-    output_file = os.path.join(os.getcwd(), "vexio_all_categories.json")
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(all_results, f, ensure_ascii=False, indent=2)
-    print(f"\nSaved {len(all_results)} items to {output_file}")
+            if checkpoint.is_done(cat_url):
+                print("    already crawled, skipping")
+                continue
+            with pool.lease() as driver:
+                pages = iter_listing(
+                    driver,
+                    cat_url,
+                    max_pages=3,
+                    start_page=checkpoint.next_page(cat_url),
+                    seen=checkpoint.seen(cat_url),
+                )
+                for page, items in pages:
+                    for i in items:
+                        i["category"] = cat_url
+                    checkpoint.commit_page(cat_url, page, items)
+            checkpoint.finish_category(cat_url)
+    total = checkpoint.resumed_items + checkpoint.sink.count
+    print(f"\nSaved {total} items to {args.output}")
 
 
 if __name__ == "__main__":
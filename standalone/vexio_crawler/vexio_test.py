@@ -1,52 +1,34 @@
-import json
+import argparse
 import os
+import sys
 import asyncio
-import random
-from typing import List, Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Tuple
 from urllib.parse import urljoin
 
 import cloudscraper
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+
+# share the driver setup and pool with the bot (repo root on sys.path)
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+from scrapers.checkpoint import CrawlCheckpoint  # noqa: E402
+from scrapers.utils import _HAS_H2, _USER_AGENTS, DriverPool, _build_driver  # noqa: E402
+
+try:
+    import httpx
+except Exception:
+    httpx = None
 
 # -------- Selenium pentru extragerea categoriilor --------
 def build_driver() -> webdriver.Chrome:
-    opts = Options()
-    opts.add_argument("--headless=new")
-    opts.add_argument("--no-sandbox")
-    opts.add_argument("--disable-dev-shm-usage")
-    opts.add_argument("--log-level=3")
-    opts.add_argument("--disable-blink-features=AutomationControlled")
-    opts.add_experimental_option(
-        "excludeSwitches", ["enable-automation", "enable-logging"]
-    )
-    opts.add_experimental_option("useAutomationExtension", False)
-    prefs = {"profile.default_content_setting_values": {"images": 2}}
-    opts.add_experimental_option("prefs", prefs)
-    user_agents = [
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-    ]
-    opts.add_argument(f"--user-agent={random.choice(user_agents)}")
-    driver = webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()), options=opts
-    )
-    driver.set_page_load_timeout(15)
-    try:
-        driver.execute_cdp_cmd(
-            "Page.addScriptToEvaluateOnNewDocument",
-            {"source": "Object.defineProperty(navigator, 'webdriver', {get: () => undefined});"},
-        )
-    except Exception:
-        pass
-    return driver
+    return _build_driver(headless=True, page_load_timeout=15)
 
 def get_main_categories(driver: webdriver.Chrome) -> List[str]:
     driver.get("https://www.vexio.ro/")
@@ -85,8 +67,7 @@ def parse_price(text: str) -> float | None:
     except Exception:
         return None
 
-def get_products_from_html(html: str, base_url: str) -> List[Dict[str, Any]]:
-    soup = BeautifulSoup(html, "lxml")
+def _products_from_soup(soup: BeautifulSoup, base_url: str) -> List[Dict[str, Any]]:
     products = []
     for el in soup.select("article.product-box"):
         try:
@@ -110,104 +91,249 @@ def get_products_from_html(html: str, base_url: str) -> List[Dict[str, Any]]:
             })
     return products
 
+def parse_page(html: str, base_url: str) -> Tuple[List[Dict[str, Any]], bool]:
+    """Products of a listing page and whether it links a next page, from a single parse."""
+    soup = BeautifulSoup(html, "lxml")
+    return _products_from_soup(soup, base_url), bool(soup.select_one("li.pagination-next a"))
+
+def get_products_from_html(html: str, base_url: str) -> List[Dict[str, Any]]:
+    return parse_page(html, base_url)[0]
+
 # -------- Async fetching --------
 MAX_CONCURRENT_REQUESTS = 50
+# pages N+1..N+PREFETCH_PAGES of a category are requested while page N is in flight
+PREFETCH_PAGES = 4
 RETRY_COUNT = 2
-semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
 
 progress_counter = 0
-progress_lock = asyncio.Lock()
 
-async def fetch_page_async(scraper, url: str, category_url: str):
+HTTP_CLIENTS = ("cloudscraper", "httpx")
+
+
+def _create_scraper(pool_size: int = MAX_CONCURRENT_REQUESTS) -> cloudscraper.CloudScraper:
+    """cloudscraper session keeping up to `pool_size` connections per host alive.
+
+    requests keeps 10 by default, so with more concurrent requests the extra
+    connections were opened and discarded on every page. The https adapter
+    is cloudscraper's own (it carries the TLS cipher setup), so it is resized
+    rather than replaced.
+    """
+    scraper = cloudscraper.create_scraper()
+    scraper.get_adapter("https://").init_poolmanager(pool_size, pool_size)
+    scraper.mount("http://", HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+    return scraper
+
+
+class CrawlContext:
+    """What every category task shares: one HTTP connection pool, the request
+    semaphore and the process pool that parses pages off the event loop.
+
+    `client` picks the HTTP stack: "cloudscraper" (default; a session used
+    from worker threads, which gets through Cloudflare challenges) or
+    "httpx" (an AsyncClient, HTTP/2 with h2, but no challenge handling).
+    """
+
+    def __init__(
+        self, parse_workers: int | None = None, prefetch: int = PREFETCH_PAGES, *, client: str = "cloudscraper"
+    ):
+        if client not in HTTP_CLIENTS:
+            raise ValueError(f"unknown HTTP client {client!r}; expected one of {HTTP_CLIENTS}")
+        if client == "httpx" and httpx is None:
+            raise RuntimeError("--client httpx needs the httpx package (pip install httpx[http2])")
+        self.semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        self.prefetch = max(1, prefetch)
+        self.parser = ProcessPoolExecutor(max_workers=parse_workers)
+        if client == "httpx":
+            self.client = httpx.AsyncClient(
+                http2=_HAS_H2,
+                follow_redirects=True,
+                timeout=20,
+                headers={"User-Agent": _USER_AGENTS[0], "Accept-Language": "ro-RO,ro;q=0.9,en;q=0.8"},
+                limits=httpx.Limits(
+                    max_connections=MAX_CONCURRENT_REQUESTS, max_keepalive_connections=MAX_CONCURRENT_REQUESTS
+                ),
+            )
+            self.scraper = None
+        else:
+            self.client = None
+            self.scraper = _create_scraper()
+
+    async def get(self, url: str) -> str:
+        if self.client is not None:
+            resp = await self.client.get(url)
+        else:
+            resp = await asyncio.to_thread(self.scraper.get, url, timeout=20)
+        resp.raise_for_status()
+        return resp.text
+
+    async def parse(self, html: str, url: str) -> Tuple[List[Dict[str, Any]], bool]:
+        return await asyncio.get_running_loop().run_in_executor(self.parser, parse_page, html, url)
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+        self.parser.shutdown(cancel_futures=True)
+
+async def fetch_page_async(ctx: CrawlContext, url: str, category_url: str):
+    """(products, next_exists) for a listing page, or None if every attempt failed."""
     global progress_counter
-    async with semaphore:
+    html = None
+    async with ctx.semaphore:
         for attempt in range(RETRY_COUNT):
             try:
-                html = await asyncio.to_thread(scraper.get, url)
-                html.raise_for_status()
-                products = get_products_from_html(html.text, url)
-                for p in products:
-                    p["category"] = category_url
-                async with progress_lock:
-                    progress_counter += len(products)
-                    print(f"[*] {url} -> Found {len(products)} products | Total processed: {progress_counter}")
-                soup = BeautifulSoup(html.text, "lxml")
-                next_exists = bool(soup.select_one("li.pagination-next a"))
-                return products, next_exists
+                html = await ctx.get(url)
+                break
             except Exception as e:
                 print(f"Attempt {attempt+1} failed for {url}: {e}")
                 await asyncio.sleep(0.1)
-        return [], False
+    if html is None:
+        return None
+    products, next_exists = await ctx.parse(html, url)
+    for p in products:
+        p["category"] = category_url
+    progress_counter += len(products)
+    print(f"[*] {url} -> Found {len(products)} products | Total processed: {progress_counter}")
+    return products, next_exists
 
-async def crawl_category_async(category_url: str, max_pages: int = 50) -> List[Dict[str, Any]]:
-    scraper = cloudscraper.create_scraper()
-    all_items = []
-    seen_urls = set()
-
-    for page in range(1, max_pages + 1):
-        url = category_url if page == 1 else urljoin(category_url, f"pagina{page}/")
-        items, next_exists = await fetch_page_async(scraper, url, category_url)
-
-        if not items:
-            print(f"[!] No products found on {url}, stopping {category_url}")
-            break
-
-        before = len(all_items)
-        for p in items:
-            if p["url"] not in seen_urls:
-                seen_urls.add(p["url"])
-                all_items.append(p)
-        after = len(all_items)
-
-        # dacă nu s-au adăugat produse noi => STOP
-        if after == before:
-            print(f"[!] No NEW products at {url}, stopping {category_url}")
-            break
-
-        if not next_exists:
-            break
-
-    return all_items
-
-# -------- Crawl toate categoriile cu as_completed --------
-async def crawl_all_categories_async(categories: List[str], output_file: str) -> List[Dict[str, Any]]:
-    tasks = [crawl_category_async(cat, 5000) for cat in categories]
-    all_results = []
-
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write("[\n")
-        first = True
-
-        for task in asyncio.as_completed(tasks):
-            results = await task
-            if results:
-                all_results.extend(results)
-                for item in results:
-                    if not first:
-                        f.write(",\n")
-                    json.dump(item, f, ensure_ascii=False, indent=2)
-                    first = False
-                f.flush()
-
-        f.write("\n]\n")
-
-    return all_results
+async def crawl_category_async(
+    ctx: CrawlContext, category_url: str, checkpoint: CrawlCheckpoint, max_pages: int = 50
+) -> int:
+    """Crawl one category, committing each page's new products to `checkpoint`; returns how many.
+
+    Up to ctx.prefetch pages are in flight at once, but pages are committed
+    in order and the crawl stops at the first page that is empty, has no new
+    products or has no next link; requests already sent past it are
+    cancelled. A page that fails every retry leaves the category unfinished,
+    so --resume picks it up again.
+    """
+    if checkpoint.is_done(category_url):
+        return 0
+    written = 0
+    seen_urls = checkpoint.seen(category_url)
+    pending: Dict[int, asyncio.Task] = {}
+    next_page = page = checkpoint.next_page(category_url)
+    finished = False
+
+    def launch():
+        nonlocal next_page
+        while next_page <= max_pages and len(pending) < ctx.prefetch:
+            url = category_url if next_page == 1 else urljoin(category_url, f"pagina{next_page}/")
+            pending[next_page] = asyncio.create_task(fetch_page_async(ctx, url, category_url))
+            next_page += 1
 
-# -------- Main --------
-def main():
-    driver = build_driver()
     try:
-        categories = get_main_categories(driver)
-        print(f"Found {len(categories)} main categories:")
-        for i, c in enumerate(categories, 1):
-            print(f"{i}. {c}")
+        launch()
+        while page in pending:
+            result = await pending.pop(page)
+            if result is None:
+                print(f"[!] Page {page} of {category_url} failed, leaving the category unfinished")
+                break
+            items, next_exists = result
+
+            if not items:
+                print(f"[!] No products found on page {page}, stopping {category_url}")
+                finished = True
+                break
+
+            new_items = []
+            for p in items:
+                if p["url"] not in seen_urls:
+                    seen_urls.add(p["url"])
+                    new_items.append(p)
+
+            # dacă nu s-au adăugat produse noi => STOP
+            if not new_items:
+                print(f"[!] No NEW products on page {page}, stopping {category_url}")
+                finished = True
+                break
+
+            # sink write + SQLite history under a file lock: keep it off the event loop
+            await asyncio.to_thread(checkpoint.commit_page, category_url, page, new_items)
+            written += len(new_items)
+
+            if not next_exists:
+                finished = True
+                break
+            page += 1
+            launch()
+        else:
+            finished = True  # max_pages reached
     finally:
-        driver.quit()
+        for task in pending.values():
+            task.cancel()
 
-    output_file = os.path.join(os.getcwd(), "vexio_products_ultrafast.json")
-    all_results = asyncio.run(crawl_all_categories_async(categories, output_file))
+    if finished:
+        await asyncio.to_thread(checkpoint.finish_category, category_url)
+    return written
+
+# -------- Crawl toate categoriile --------
+async def crawl_all_categories_async(
+    categories: List[str],
+    output_file: str,
+    compress: str | None = None,
+    *,
+    resume: bool = False,
+    checkpoint_file: str | None = None,
+    prefetch: int = PREFETCH_PAGES,
+    parse_workers: int | None = None,
+    client: str = "cloudscraper",
+) -> int:
+    """Crawl all categories into a JSON Lines file, page by page; returns the item count.
+
+    Progress is logged to `checkpoint_file` (default <output>.checkpoint); with
+    `resume`, finished categories and pages from an earlier run are skipped.
+    """
+    checkpoint_file = checkpoint_file or output_file + ".checkpoint"
+    ctx = CrawlContext(parse_workers=parse_workers, prefetch=prefetch, client=client)
+    try:
+        with CrawlCheckpoint(
+            checkpoint_file, output_file, compress=compress, resume=resume, history="vexio"
+        ) as checkpoint:
+            await asyncio.gather(*(crawl_category_async(ctx, cat, checkpoint, 5000) for cat in categories))
+            return checkpoint.resumed_items + checkpoint.sink.count
+    finally:
+        await ctx.close()
+
+# -------- Main --------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Crawl every Vexio category over HTTP.")
+    parser.add_argument("--output", help="JSON Lines output (default: ./vexio_products_ultrafast.jsonl[.gz|.zst])")
+    parser.add_argument("--compress", choices=("gzip", "zstd"), help="compress the output stream")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted crawl from its checkpoint")
+    parser.add_argument("--checkpoint", help="checkpoint log (default: <output>.checkpoint)")
+    parser.add_argument("--prefetch", type=int, default=PREFETCH_PAGES, help="pages per category fetched ahead")
+    parser.add_argument("--parse-workers", type=int, help="parser processes (default: one per CPU)")
+    parser.add_argument(
+        "--client",
+        choices=HTTP_CLIENTS,
+        default="cloudscraper",
+        help="HTTP stack: cloudscraper handles Cloudflare challenges, httpx adds HTTP/2 (default: cloudscraper)",
+    )
+    args = parser.parse_args(argv)
+    if not args.output:
+        suffix = {"gzip": ".gz", "zstd": ".zst"}.get(args.compress, "")
+        args.output = os.path.join(os.getcwd(), "vexio_products_ultrafast.jsonl" + suffix)
+
+    with DriverPool(size=1, factory=build_driver) as pool, pool.lease() as driver:
+        categories = get_main_categories(driver)
+    print(f"Found {len(categories)} main categories:")
+    for i, c in enumerate(categories, 1):
+        print(f"{i}. {c}")
+
+    total = asyncio.run(
+        crawl_all_categories_async(
+            categories,
+            args.output,
+            args.compress,
+            resume=args.resume,
+            checkpoint_file=args.checkpoint,
+            prefetch=args.prefetch,
+            parse_workers=args.parse_workers,
+            client=args.client,
+        )
+    )
 
-    print(f"\nSaved {len(all_results)} items to {output_file}")
+    print(f"\nSaved {total} items to {args.output}")
 
 if __name__ == "__main__":
     main()
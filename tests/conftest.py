@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.dirname(os.path.abspath(__file__))):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+@pytest.fixture
+def tmp_cache(tmp_path, monkeypatch):
+    """Point the cache module at an empty database under tmp_path."""
+    import cache
+
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(cache, "CACHE_DB", str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(cache, "CACHE_FILE", str(tmp_path / "cache.json"))
+    monkeypatch.setattr(cache, "CACHE_LOCK", str(tmp_path / "cache.lock"))
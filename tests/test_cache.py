@@ -0,0 +1,34 @@
+import pytest
+
+import cache
+from scrapers.utils import _score_titles
+
+
+def test_find_best_keeps_candidates_tied_at_the_cutoff(monkeypatch, tmp_cache):
+    # every title shares the same grams with the query; only the last one is a match
+    monkeypatch.setattr(cache, "FIND_BEST_CANDIDATES", 5)
+    for i in range(100):
+        cache.upsert("altex", {"title": f"Cablu alb {i}", "price": 10.0, "url": f"https://altex.ro/cablu-{i}/"})
+    cache.upsert("altex", {"title": "Cana alb - portelan", "price": 20.0, "url": "https://altex.ro/cana/"})
+
+    best = cache.find_best("altex", "alb -", batch_scorer=_score_titles)
+
+    assert best is not None
+    assert best["url"] == "https://altex.ro/cana/"
+
+
+def test_find_best_matches_a_full_scan(tmp_cache):
+    titles = ["Laptop ASUS Vivobook 15", "Mouse Logitech MX Master 3S", "Monitor LG 27 inch", "Cablu HDMI 2m"]
+    for i, title in enumerate(titles):
+        cache.upsert("altex", {"title": title, "price": 100.0 + i, "url": f"https://altex.ro/p{i}/"})
+
+    for query in ("logitech mx master", "monitor lg 27", "hdmi 2m", "vivobook"):
+        scores = _score_titles(titles, query)
+        expected = titles[int(scores.argmax())] if scores.max() >= 90 else None
+        best = cache.find_best("altex", query, batch_scorer=_score_titles)
+        assert (best["title"] if best else None) == expected
+
+
+def test_find_best_without_a_scorer_is_a_type_error(tmp_cache):
+    with pytest.raises(TypeError, match="scorer"):
+        cache.find_best("altex", "laptop")
@@ -0,0 +1,93 @@
+import json
+import time
+from typing import Optional
+
+import pytest
+
+import cache
+from scrapers import altex, catalog, orchestrator
+
+URL = "https://altex.ro/placa-video-rtx-4070/cpd/ABC123/"
+RECORDS = [{"title": "Placa video RTX 4070 Super", "price": 2999.0, "url": URL}]
+
+
+def _catalog(tmp_path, monkeypatch, age: Optional[float], records=RECORDS) -> None:
+    """A catalog of `records`, crawled `age` seconds ago (None: no crawl recorded).
+
+    The dump itself is written now, as after a fresh checkout.
+    """
+    dump = tmp_path / "altex_all_categories.json"
+    dump.write_text(json.dumps(records))
+    if age is not None:
+        crawl_id = cache.begin_crawl("altex", str(dump))
+        with monkeypatch.context() as m:
+            m.setattr(cache, "_now_ts", lambda: time.time() - age)
+            cache.finish_crawl(crawl_id)
+    cat = catalog.Catalog("altex", root=str(tmp_path / "catalog"))
+    cat.build([str(dump)])
+    monkeypatch.setitem(catalog._catalogs, "altex", cat)
+
+
+def _live_search(calls):
+    def search(site, url, driver, spec, query):
+        calls.append(url)
+        return {"title": "Placa video RTX 4070 Super", "price": 3100.0, "url": URL}, None
+
+    return search
+
+
+@pytest.mark.parametrize("age", [cache.DEFAULT_MAX_AGE + 3600, None], ids=["old-crawl", "unknown-crawl"])
+def test_old_catalog_hit_is_refreshed_from_its_url(tmp_path, monkeypatch, tmp_cache, age):
+    _catalog(tmp_path, monkeypatch, age=age)
+    refreshed = []
+
+    def refresh(url, driver=None, *, query=None):
+        refreshed.append(url)
+        return {"title": "Placa video RTX 4070 Super", "price": 3050.0, "url": url, "source": "live"}
+
+    searched = []
+    monkeypatch.setitem(orchestrator.REFRESHERS, "altex", refresh)
+    monkeypatch.setattr(altex, "_search_page", _live_search(searched))
+
+    result = altex.search_altex("RTX 4070 Super", None)
+
+    assert refreshed == [URL]
+    assert searched == []
+    assert result["price"] == 3050.0
+    assert result["source"] == "live"
+
+
+def test_old_catalog_hit_falls_back_to_live_search(tmp_path, monkeypatch, tmp_cache):
+    _catalog(tmp_path, monkeypatch, age=cache.DEFAULT_MAX_AGE + 3600)
+    searched = []
+    monkeypatch.setitem(orchestrator.REFRESHERS, "altex", lambda url, driver=None, *, query=None: None)
+    monkeypatch.setattr(altex, "_search_page", _live_search(searched))
+
+    result = altex.search_altex("RTX 4070 Super", None)
+
+    assert len(searched) == 1
+    assert result["price"] == 3100.0
+    assert result.get("source") == "live"
+
+
+def test_recent_catalog_hit_is_served(tmp_path, monkeypatch, tmp_cache):
+    _catalog(tmp_path, monkeypatch, age=60)
+    searched = []
+    monkeypatch.setattr(altex, "_search_page", _live_search(searched))
+
+    result = altex.search_altex("RTX 4070 Super", None)
+
+    assert searched == []
+    assert result["price"] == 2999.0
+    assert result["source"] == "catalog"
+
+
+def test_ambiguous_catalog_match_is_not_used(tmp_path, monkeypatch, tmp_cache):
+    records = [
+        {"title": "Garnitura usa frigider SAMSUNG, alb, DA97-13921K", "price": 89.0, "url": "https://altex.ro/g/"},
+        {"title": "Raft (polita) din sticla pentru frigider SAMSUNG, DA97-17684A", "price": 129.0, "url": "https://altex.ro/r/"},
+    ]
+    _catalog(tmp_path, monkeypatch, age=60, records=records)
+
+    assert catalog.catalog_lookup("altex", "frigider samsung") is None
+    assert catalog.catalog_lookup("altex", "Garnitura usa frigider SAMSUNG alb DA97-13921K")["url"] == "https://altex.ro/g/"
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+from selenium.common.exceptions import SessionNotCreatedException
+
+from scrapers import utils
+
+from test_driver_pool import FakeDriver
+
+
+class ChromeDriver(FakeDriver):
+    def set_page_load_timeout(self, _seconds):
+        pass
+
+
+@pytest.fixture
+def driver_cache(tmp_path, monkeypatch):
+    old, new = tmp_path / "chromedriver-old", tmp_path / "chromedriver-new"
+    old.write_text("")
+    new.write_text("")
+    cache_file = tmp_path / "chromedriver.json"
+    cache_file.write_text(json.dumps({"_last": str(old)}))
+    monkeypatch.delenv("CHROMEDRIVER_PATH", raising=False)
+    monkeypatch.setattr(utils, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(utils, "CHROMEDRIVER_CACHE_FILE", str(cache_file))
+    monkeypatch.setattr(utils, "_chrome_version", lambda: None)
+
+    class Manager:
+        def install(self):
+            return str(new)
+
+    monkeypatch.setattr(utils, "ChromeDriverManager", Manager)
+    return old, new, cache_file
+
+
+def test_stale_cached_chromedriver_is_replaced(driver_cache, monkeypatch):
+    old, new, cache_file = driver_cache
+    started = []
+
+    def chrome(service, options):
+        started.append(service.path)
+        if service.path == str(old):
+            raise SessionNotCreatedException("This version of ChromeDriver only supports Chrome version 126")
+        return ChromeDriver()
+
+    monkeypatch.setattr(utils.webdriver, "Chrome", chrome)
+
+    utils._build_driver(headless=True)
+
+    assert started == [str(old), str(new)]
+    assert json.loads(cache_file.read_text()) == {"_last": str(new)}
+
+
+def test_fresh_chromedriver_failure_is_not_retried(driver_cache, monkeypatch):
+    old, new, cache_file = driver_cache
+    cache_file.write_text("{}")
+    started = []
+
+    def chrome(service, options):
+        started.append(service.path)
+        raise SessionNotCreatedException("Chrome failed to start")
+
+    monkeypatch.setattr(utils.webdriver, "Chrome", chrome)
+
+    with pytest.raises(SessionNotCreatedException):
+        utils._build_driver(headless=True)
+    assert started == [str(new)]
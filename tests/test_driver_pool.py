@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from scrapers.utils import DriverPool
+
+
+class FakeDriver:
+    def __init__(self):
+        self.quit_called = False
+
+    def execute_script(self, *_):
+        return 1
+
+    def execute_cdp_cmd(self, *_):
+        pass
+
+    def get(self, _url):
+        pass
+
+    def quit(self):
+        self.quit_called = True
+
+
+def _pool(size=1):
+    return DriverPool(size=size, factory=FakeDriver, max_rss_mb=None)
+
+
+def test_waiter_wakes_when_a_broken_driver_is_released():
+    pool = _pool()
+    held = pool.acquire()
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire(timeout=5)))
+    waiter.start()
+    time.sleep(0.1)
+    assert not got  # blocked: the only slot is taken
+
+    pool.release(held, broken=True)
+    waiter.join(timeout=1)
+
+    assert not waiter.is_alive()
+    assert got and got[0] is not held
+    assert held.quit_called
+
+
+def test_waiter_reuses_a_returned_driver():
+    pool = _pool()
+    held = pool.acquire()
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire(timeout=5)))
+    waiter.start()
+    time.sleep(0.1)
+    pool.release(held)
+    waiter.join(timeout=1)
+    assert got == [held]
+
+
+def test_acquire_times_out_when_full():
+    pool = _pool()
+    pool.acquire()
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.2)
+    assert time.monotonic() - start < 1
+
+
+def test_close_and_cancel_wake_waiters():
+    pool = _pool()
+    pool.acquire()
+    cancel = threading.Event()
+    errors = []
+
+    def wait(**kw):
+        try:
+            pool.acquire(**kw)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    cancelled = threading.Thread(target=wait, kwargs={"cancel": cancel})
+    closed = threading.Thread(target=wait)
+    cancelled.start()
+    closed.start()
+    time.sleep(0.1)
+
+    cancel.set()
+    pool.wake()
+    cancelled.join(timeout=1)
+    assert not cancelled.is_alive()
+
+    pool.close()
+    closed.join(timeout=1)
+    assert not closed.is_alive()
+    assert len(errors) == 2
@@ -0,0 +1,34 @@
+from scrapers import utils
+
+
+def _fetcher(monkeypatch):
+    fetcher = utils.Fetcher(modes_file=None)
+    monkeypatch.setattr(fetcher, "get_html", lambda url: ("<html><body>nimic</body></html>", url))
+    monkeypatch.setattr(utils, "_throttled_get", lambda drv, url, ready=None: "<html>pret</html>")
+    return fetcher
+
+
+def test_product_page_needing_the_browser_leaves_searches_on_http(monkeypatch):
+    fetcher = _fetcher(monkeypatch)
+
+    found = fetcher.fetch(
+        "altex",
+        "https://altex.ro/p/cpd/X/",
+        object(),
+        parse=lambda html, url: None,
+        browser=lambda drv, html: {"price": 1.0},
+        kind="product",
+    )
+
+    assert found == {"price": 1.0}
+    assert fetcher.mode("altex", "product") == "browser"
+    assert fetcher.mode("altex") == "http"
+
+
+def test_search_mode_keeps_the_bare_site_key(monkeypatch):
+    fetcher = _fetcher(monkeypatch)
+
+    fetcher.fetch("altex", "https://altex.ro/cauta/?q=x", object(), parse=lambda html, url: [], browser=lambda drv, html: [1])
+
+    assert fetcher._modes["altex"]["mode"] == "browser"
+    assert fetcher.mode("altex", "product") == "http"
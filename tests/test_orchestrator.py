@@ -0,0 +1,85 @@
+import threading
+import time
+
+from scrapers import orchestrator
+from scrapers.utils import DriverPool
+
+from test_driver_pool import FakeDriver
+
+
+def _slow_searcher(hold: float):
+    def search(product, driver, use_cache=True):
+        driver()
+        time.sleep(hold)
+        return {"title": product, "price": 1.0, "url": "u"}
+
+    return search
+
+
+def _run_in_thread(fn):
+    t = threading.Thread(target=fn, daemon=True)
+    t.start()
+    return t
+
+
+def test_deadline_with_pool_smaller_than_sites_does_not_hang(monkeypatch):
+    sites = {f"s{i}": _slow_searcher(0.5) for i in range(5)}
+    monkeypatch.setattr(orchestrator, "SEARCHERS", sites)
+    results = []
+
+    def run():
+        with DriverPool(size=2, factory=FakeDriver, max_rss_mb=None) as pool:
+            results.extend(orchestrator.search_all("x", deadline=0.3, pool=pool))
+
+    t = _run_in_thread(run)
+    t.join(timeout=5)
+
+    assert not t.is_alive(), "search_all deadlocked on exit"
+    assert sorted(site for site, _ in results) == sorted(sites)
+    assert all(result is None for _, result in results)
+
+
+def test_closing_the_generator_early_does_not_hang(monkeypatch):
+    sites = {"fast": _slow_searcher(0.0), **{f"s{i}": _slow_searcher(1.0) for i in range(4)}}
+    monkeypatch.setattr(orchestrator, "SEARCHERS", sites)
+    first = []
+
+    def run():
+        with DriverPool(size=1, factory=FakeDriver, max_rss_mb=None) as pool:
+            gen = orchestrator.search_all("x", deadline=30, pool=pool)
+            first.append(next(gen))
+            gen.close()
+
+    t = _run_in_thread(run)
+    t.join(timeout=5)
+
+    assert not t.is_alive(), "generator.close() deadlocked"
+    assert first
+
+
+def test_release_without_driver_is_a_noop():
+    pool = DriverPool(size=1, factory=FakeDriver, max_rss_mb=None)
+    lazy = orchestrator._LazyDriver(FakeDriver, pool)
+    lazy.release(broken=True)
+    assert pool._count == 0
+
+
+def test_refresh_prices_reuses_drivers_without_a_pool(monkeypatch):
+    built = []
+
+    def factory():
+        built.append(FakeDriver())
+        return built[-1]
+
+    def refresh(url, driver=None, *, query=None):
+        driver()
+        return {"title": url, "price": 1.0, "url": url}
+
+    monkeypatch.setitem(orchestrator.REFRESHERS, "altex", refresh)
+    urls = [f"https://altex.ro/p{i}/cpd/X{i}/" for i in range(6)]
+
+    results = dict(orchestrator.refresh_prices(urls, workers=2, driver_factory=factory))
+
+    assert sorted(results) == sorted(urls)
+    assert 1 <= len(built) <= 2
+    assert all(d.quit_called for d in built)
@@ -0,0 +1,37 @@
+import errno
+
+from scrapers import ratelimit
+from scrapers.ratelimit import HostRateLimiter
+
+
+def _limiter(path):
+    return HostRateLimiter(initial_rate=100.0, max_rate=100.0, jitter=0.0, state_file=str(path))
+
+
+def test_state_is_shared_through_the_file(tmp_path):
+    path = tmp_path / "ratelimit.json"
+    _limiter(path).report("altex.ro", blocked=True)
+
+    assert _limiter(path).rate("altex.ro") == 50.0
+
+
+def test_failed_state_write_does_not_break_requests(tmp_path, monkeypatch):
+    def full_disk(*_args, **_kwargs):
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    monkeypatch.setattr(ratelimit.json, "dump", full_disk)
+    limiter = _limiter(tmp_path / "ratelimit.json")
+
+    limiter.acquire("altex.ro")
+    limiter.report("altex.ro", blocked=True)
+
+    assert limiter.rate("altex.ro") == 50.0
+
+
+def test_unreadable_state_file_falls_back_to_memory(tmp_path):
+    limiter = _limiter(tmp_path / "missing" / "dir")
+    (tmp_path / "missing").write_text("not a directory")
+
+    limiter.report("altex.ro", blocked=True)
+
+    assert limiter.rate("altex.ro") == 50.0
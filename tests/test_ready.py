@@ -0,0 +1,69 @@
+import time
+
+from scrapers import utils
+
+
+class PageDriver:
+    """Fake driver on a page whose cards appear `cards_after` seconds after load.
+
+    The network goes quiet at once, as with an XHR Resource Timing does not
+    list until it finishes.
+    """
+
+    capabilities = {"pageLoadStrategy": "eager"}
+    page_load_timeout = 2
+
+    def __init__(self, cards_after: float):
+        self.cards_after = cards_after
+        self.loaded_at = None
+        self.page_source = "<html><body></body></html>"
+
+    def get(self, _url):
+        self.loaded_at = time.monotonic()
+
+    def execute_script(self, script, *args):
+        if script != utils._READY_JS:
+            return None
+        _sel, idle_ms = args
+        if time.monotonic() - self.loaded_at >= self.cards_after:
+            return "selector"
+        return "idle" if idle_ms is not None else None
+
+
+class _NoLimit:
+    def acquire(self, host):
+        pass
+
+    def report(self, host, **_):
+        pass
+
+
+def test_idle_page_keeps_waiting_for_the_cards(monkeypatch):
+    monkeypatch.setattr(utils, "RATE_LIMITER", _NoLimit())
+    driver = PageDriver(cards_after=0.5)
+
+    utils._throttled_get(driver, "https://altex.ro/cauta/?q=x", ready=".card")
+
+    assert driver.last_ready == "selector"
+    assert time.monotonic() - driver.loaded_at >= 0.5
+
+
+def test_cards_that_never_come_are_not_recorded_as_no_cards(monkeypatch):
+    monkeypatch.setattr(utils, "RATE_LIMITER", _NoLimit())
+    driver = PageDriver(cards_after=60)
+    driver.page_load_timeout = 0.3
+
+    html = utils._throttled_get(driver, "https://altex.ro/cauta/?q=x", ready=".card")
+
+    assert driver.last_ready == "idle"
+    assert utils._miss_reason(html, driver) == "timeout"
+
+
+def test_settle_idle_leaves_other_states_alone():
+    driver = PageDriver(cards_after=60)
+    driver.get("https://altex.ro/")
+
+    assert utils._settle_idle(driver, ".card", "selector", 0.0) == "selector"
+    assert utils._settle_idle(driver, ".card", None, 0.0) is None
+    assert utils._settle_idle(driver, None, "idle", 0.0) == "idle"
+    assert utils._settle_idle(driver, ".card", "idle", driver.page_load_timeout) == "idle"
@@ -0,0 +1,64 @@
+import cache
+from scrapers import refresh
+from scrapers.utils import DriverPool
+
+from test_driver_pool import FakeDriver
+
+URL = "https://altex.ro/placa-video-rtx-4070/cpd/ABC123/"
+
+
+def test_refresher_updates_the_cache_for_its_query(monkeypatch, tmp_cache):
+    monkeypatch.setattr(
+        refresh, "_product_page", lambda site, url, driver, spec: {"title": "RTX 4070", "price": 2999.0, "url": url}
+    )
+    refresh_altex = refresh._make_refresher("altex", {"price": ".price"})
+
+    result = refresh_altex(URL, query="rtx 4070")
+
+    assert result["price"] == 2999.0
+    assert result["source"] == "live"
+    assert cache.get_for_query("altex", "RTX 4070")["url"] == URL
+
+
+def test_refresher_without_a_price_returns_none(monkeypatch, tmp_cache):
+    monkeypatch.setattr(refresh, "_product_page", lambda site, url, driver, spec: None)
+
+    assert refresh._make_refresher("altex", {})(URL) is None
+
+
+def test_background_refreshes_lease_from_the_shared_pool():
+    built = []
+
+    def factory():
+        built.append(FakeDriver())
+        return built[-1]
+
+    used = []
+
+    def search(query, driver, use_cache=True):
+        used.append(driver())
+
+    with DriverPool(size=1, factory=factory, max_rss_mb=None) as pool:
+        refresher = refresh.Refresher(workers=2, pool=pool)
+        for q in ("a", "b", "c"):
+            assert refresher.submit("altex", q, search)
+        refresher.close(wait=True)
+
+        assert refresher.pending() == 0
+        assert len(used) == 3
+        assert len(built) == 1  # one pooled driver served every job
+        assert not built[0].quit_called  # the shared pool still owns it
+
+
+def test_close_quits_the_refreshers_own_pool():
+    built = []
+
+    def factory():
+        built.append(FakeDriver())
+        return built[-1]
+
+    refresher = refresh.Refresher(workers=1, driver_factory=factory)
+    refresher.submit("altex", "a", lambda query, driver, use_cache=True: driver())
+    refresher.close(wait=True)
+
+    assert len(built) == 1 and built[0].quit_called
@@ -0,0 +1,85 @@
+import threading
+import time
+
+import cache
+from scrapers import utils, watch
+
+URL = "https://www.pcgarage.ro/placi-video/asus/rtx-4070/"
+
+
+def _watcher(monkeypatch, refresh, search):
+    monkeypatch.setattr(watch, "SEARCHERS", {"pcgarage": search})
+    monkeypatch.setattr(watch, "REFRESHERS", {"pcgarage": refresh})
+    watcher = watch.Watcher(
+        [{"query": "RTX 4070", "target": 100}], pages_per_hour=3600 * 1000, alerts_file=None
+    )
+    charged = []
+
+    def reserve(host):
+        charged.append(host)
+        return 0.0
+
+    monkeypatch.setattr(watcher._budget, "reserve", reserve)
+    return watcher, charged
+
+
+def _search_with_specs(query, driver, use_cache=True):
+    utils._count_load()  # search page
+    utils._count_load()  # specs page
+    return {"title": "Placa video RTX 4070", "price": 2999.0, "url": URL}
+
+
+def test_every_page_of_a_search_is_charged(monkeypatch, tmp_cache):
+    watcher, charged = _watcher(monkeypatch, lambda url, driver=None, *, query=None: None, _search_with_specs)
+
+    watcher.check(watcher._queues["pcgarage"][0][2])
+
+    assert charged == ["pages", "pages"]
+    assert watcher.stats["pages"] == 2
+    assert watcher.stats["live"] == 1
+
+
+def test_refresh_falling_back_to_a_search_is_charged_for_both(monkeypatch, tmp_cache):
+    cache.upsert_for_query("pcgarage", "RTX 4070", {"title": "Placa video RTX 4070", "price": 3100.0, "url": URL})
+
+    refreshed = []
+
+    def refresh(url, driver=None, *, query=None):
+        refreshed.append(url)
+        utils._count_load()
+        return None
+
+    def search(query, driver, use_cache=True):
+        utils._count_load()
+        return {"title": "Placa video RTX 4070", "price": 2999.0, "url": URL}
+
+    watcher, charged = _watcher(monkeypatch, refresh, search)
+    monkeypatch.setattr(watch, "is_stale", lambda site, item: True)
+
+    watcher.check(watcher._queues["pcgarage"][0][2])
+
+    assert refreshed == [URL]
+    assert charged == ["pages", "pages"]
+    assert watcher.stats["pages"] == 2
+
+
+def test_stop_interrupts_a_budget_wait(monkeypatch, tmp_cache):
+    searched = []
+
+    def search(query, driver, use_cache=True):
+        searched.append(query)
+        utils._count_load()
+        return {"title": "Placa video RTX 4070", "price": 2999.0, "url": URL}
+
+    monkeypatch.setattr(watch, "SEARCHERS", {"pcgarage": search})
+    monkeypatch.setattr(watch, "REFRESHERS", {"pcgarage": lambda url, driver=None, *, query=None: None})
+    watcher = watch.Watcher([{"query": "RTX 4070", "target": 100}], pages_per_hour=1, alerts_file=None)
+    check = watcher._queues["pcgarage"][0][2]
+    watcher.check(check)  # spends the only page of this hour
+
+    threading.Timer(0.1, watcher.stop).start()
+    started = time.monotonic()
+    assert watcher.check(check) is None
+
+    assert time.monotonic() - started < 5
+    assert len(searched) == 1